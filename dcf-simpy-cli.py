@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 import logging
-import threading
+import os
+from dataclasses import fields
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 import click
@@ -71,6 +73,111 @@ def cli(verbose: int) -> None:
     help="If provided, results are not shown, to show results you can't skip-results.",
 )
 @click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    type=float,
+    default=None,
+    help="If provided, runs are added until half widths of 95% confidence intervals"
+    " of THR and P_COLL are at most this part of their means, runs is the initial"
+    " number of runs.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=100,
+    help="Maximal number of runs per point with target-ci.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--common-random-numbers",
+    "common_random_numbers",
+    is_flag=True,
+    help="If provided, run i of every point uses the same seed, so differences"
+    " between points have lower variance.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--traffic",
+    "traffic",
+    type=click.Choice(dcfsimpy.TRAFFIC),
+    default="saturated",
+    help="Arrival process of frames of every station.",
+)
+@click.option(
+    "--load",
+    "load",
+    default=0.0,
+    help="Offered load of every station in Mb/s, during on periods for on-off.",
+)
+@click.option(
+    "--queue-size",
+    "queue_size",
+    default=100,
+    help="Frames queued by a station with unsaturated traffic.",
+)
+@click.option(
+    "--on-time", "on_time", default=0.01, help="Mean on period of on-off traffic in s."
+)
+@click.option(
+    "--off-time",
+    "off_time",
+    default=0.01,
+    help="Mean off period of on-off traffic in s.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
 def run_changing_stations(
     runs: int,
     seed: int,
@@ -84,34 +191,69 @@ def run_changing_stations(
     payload_size: int,
     mcs_value: int,
     skip_results_show: bool,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    traffic: str,
+    load: float,
+    queue_size: int,
+    on_time: float,
+    off_time: float,
+    queue: Optional[str],
+    lease_timeout: float,
 ):
-    config = dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value)
-    results = dict()
-    backoffs = {
-        key: {i: 0 for i in range(stations_start, stations_end + 1)}
-        for key in range(cw_max + 1)
-    }
-    for _ in range(runs):
-        threads = [
-            threading.Thread(
-                target=dcfsimpy.run_simulation,
-                args=(
-                    n,
-                    seed * _,
-                    simulation_time,
-                    skip_results,
-                    config,
-                    backoffs,
-                    results,
-                ),
-            )
-            for n in range(stations_start, stations_end + 1)
-        ]
-        __start_threads(threads)
+    config = dcfsimpy.Config(
+        payload_size,
+        cw_min,
+        cw_max,
+        r_limit,
+        mcs_value,
+        traffic,
+        load,
+        queue_size,
+        on_time,
+        off_time,
+    )
+    backoffs = dcfsimpy.BackoffHistogram(
+        cw_max, range(stations_start, stations_end + 1)
+    )
+    points = [
+        dcfsimpy.Job(n, 0, simulation_time, config, engine)
+        for n in range(stations_start, stations_end + 1)
+    ]
+    results = (
+        None
+        if skip_results
+        else dcfsimpy.ResultsWriter(backoffs, "run_changing_stations")
+    )
+    __run_points(
+        points,
+        runs,
+        seed,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        no_cache,
+        target_ci,
+        max_runs,
+        metrics,
+        common_random_numbers,
+        time_series,
+        delays,
+        queue,
+        lease_timeout,
+    )
     if not skip_results:
-        path = dcfsimpy.save_results(results, backoffs, "run_changing_stations")
+        path = results.close()
         if not skip_results_show:
-            dcfsimpy.show_results_changing_stations(path)
+            dcfsimpy.report(path, workers, update_reference=True)
 
 
 @cli.command()
@@ -146,6 +288,83 @@ def run_changing_stations(
     is_flag=True,
     help="If provided, results are not saved.",
 )
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    type=float,
+    default=None,
+    help="If provided, runs are added until half widths of 95% confidence intervals"
+    " of THR and P_COLL are at most this part of their means, runs is the initial"
+    " number of runs.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=100,
+    help="Maximal number of runs per point with target-ci.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--common-random-numbers",
+    "common_random_numbers",
+    is_flag=True,
+    help="If provided, run i of every point uses the same seed, so differences"
+    " between points have lower variance.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
 def run_changing_mcs(
     runs: int,
     seed: int,
@@ -156,29 +375,53 @@ def run_changing_mcs(
     cw_max: int,
     r_limit: int,
     payload_size: int,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    queue: Optional[str],
+    lease_timeout: float,
 ):
-    results = dict()
-    backoffs = {key: {stations_number: 0} for key in range(cw_max + 1)}
-    for _ in range(runs):
-        threads = [
-            threading.Thread(
-                target=dcfsimpy.run_simulation,
-                args=(
-                    stations_number,
-                    seed * _,
-                    simulation_time,
-                    skip_results,
-                    dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
-                    backoffs,
-                    results,
-                ),
-            )
-            for mcs_value in range(0, 8)
-        ]
-        __start_threads(threads)
+    backoffs = dcfsimpy.BackoffHistogram(cw_max, [stations_number])
+    points = [
+        dcfsimpy.Job(
+            stations_number,
+            0,
+            simulation_time,
+            dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
+            engine,
+        )
+        for mcs_value in range(0, 8)
+    ]
+    results = (
+        None if skip_results else dcfsimpy.ResultsWriter(backoffs, "run_changing_mcs")
+    )
+    __run_points(
+        points,
+        runs,
+        seed,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        no_cache,
+        target_ci,
+        max_runs,
+        metrics,
+        common_random_numbers,
+        time_series,
+        delays,
+        queue,
+        lease_timeout,
+    )
     if not skip_results:
-        path = dcfsimpy.save_results(results, backoffs, "run_changing_mcs")
-        dcfsimpy.show_results_changing_mcs(path)
+        path = results.close()
+        dcfsimpy.report(path, workers, update_reference=True)
 
 
 @cli.command()
@@ -214,7 +457,7 @@ def run_changing_mcs(
 @click.option(
     "-p", "--payload-size", "payload_size", default=1472, help="Size of payload in B."
 )
-@click.option("--cw-min-start", "cw_min_stop", default=3, help="Size of cw min start.")
+@click.option("--cw-min-start", "cw_min_start", default=3, help="Size of cw min start.")
 @click.option("--cw-min-stop", "cw_min_stop", default=1023, help="Size of cw min stop.")
 @click.option("--cw-max", "cw_max", default=1023, help="Size of cw max.")
 @click.option(
@@ -229,8 +472,85 @@ def run_changing_mcs(
     help="If provided, results are not saved.",
 )
 @click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
 # @click.option("-p", "--results-path", "results_path", help="Path to save results, default results/timestamp.")
 # @click.option("--results-prefix", "results_prefix", default=None, help="Prefix for results files.")
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    type=float,
+    default=None,
+    help="If provided, runs are added until half widths of 95% confidence intervals"
+    " of THR and P_COLL are at most this part of their means, runs is the initial"
+    " number of runs.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=100,
+    help="Maximal number of runs per point with target-ci.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--common-random-numbers",
+    "common_random_numbers",
+    is_flag=True,
+    help="If provided, run i of every point uses the same seed, so differences"
+    " between points have lower variance.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
 def run_changing_cw(
     runs: int,
     seed: int,
@@ -245,39 +565,60 @@ def run_changing_cw(
     r_limit: int,
     payload_size: int,
     mcs_value: int,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    queue: Optional[str],
+    lease_timeout: float,
 ):
     # config = dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit)
-    results = dict()
-    backoffs = {
-        key: {i: 0 for i in range(stations_start, stations_end + 1)}
-        for key in range(cw_max + 1)
-    }
-    for cw_min in [
-        pow(2, x) - 1
-        for x in range(int((cw_min_start + 1) / 2), int((cw_min_stop + 1) / 2))
-    ]:
-        for _ in range(runs):
-            threads = [
-                threading.Thread(
-                    target=dcfsimpy.run_simulation,
-                    args=(
-                        n,
-                        seed * _,
-                        simulation_time,
-                        skip_results,
-                        dcfsimpy.Config(
-                            payload_size, cw_min, cw_max, r_limit, mcs_value
-                        ),
-                        backoffs,
-                        results,
-                    ),
-                )
-                for n in range(stations_start, stations_end + 1, stations_step)
-            ]
-            __start_threads(threads)
+    backoffs = dcfsimpy.BackoffHistogram(
+        cw_max, range(stations_start, stations_end + 1, stations_step)
+    )
+    points = [
+        dcfsimpy.Job(
+            n,
+            0,
+            simulation_time,
+            dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
+            engine,
+        )
+        for cw_min in [
+            pow(2, x) - 1
+            for x in range(int((cw_min_start + 1) / 2), int((cw_min_stop + 1) / 2))
+        ]
+        for n in range(stations_start, stations_end + 1, stations_step)
+    ]
+    results = (
+        None if skip_results else dcfsimpy.ResultsWriter(backoffs, "run_changing_cw")
+    )
+    __run_points(
+        points,
+        runs,
+        seed,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        no_cache,
+        target_ci,
+        max_runs,
+        metrics,
+        common_random_numbers,
+        time_series,
+        delays,
+        queue,
+        lease_timeout,
+    )
     if not skip_results:
-        path = dcfsimpy.save_results(results, backoffs, "run_changing_cw")
-        dcfsimpy.show_results_changing_cw(path)
+        path = results.close()
+        dcfsimpy.report(path, workers, update_reference=True)
 
 
 @cli.command()
@@ -325,6 +666,83 @@ def run_changing_cw(
     help="If provided, results are not saved.",
 )
 @click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    type=float,
+    default=None,
+    help="If provided, runs are added until half widths of 95% confidence intervals"
+    " of THR and P_COLL are at most this part of their means, runs is the initial"
+    " number of runs.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=100,
+    help="Maximal number of runs per point with target-ci.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--common-random-numbers",
+    "common_random_numbers",
+    is_flag=True,
+    help="If provided, run i of every point uses the same seed, so differences"
+    " between points have lower variance.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
 def run_changing_payload(
     runs: int,
     seed: int,
@@ -338,31 +756,57 @@ def run_changing_payload(
     payload_end_size: int,
     payload_step_size: int,
     mcs_value: int,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    queue: Optional[str],
+    lease_timeout: float,
 ):
-    results = dict()
-    backoffs = {key: {stations_number: 0} for key in range(cw_max + 1)}
-    for _ in range(runs):
-        threads = [
-            threading.Thread(
-                target=dcfsimpy.run_simulation,
-                args=(
-                    stations_number,
-                    seed * _,
-                    simulation_time,
-                    skip_results,
-                    dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
-                    backoffs,
-                    results,
-                ),
-            )
-            for payload_size in range(
-                payload_start_size, payload_end_size + 1, payload_step_size
-            )
-        ]
-        __start_threads(threads)
+    backoffs = dcfsimpy.BackoffHistogram(cw_max, [stations_number])
+    points = [
+        dcfsimpy.Job(
+            stations_number,
+            0,
+            simulation_time,
+            dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
+            engine,
+        )
+        for payload_size in range(
+            payload_start_size, payload_end_size + 1, payload_step_size
+        )
+    ]
+    results = (
+        None
+        if skip_results
+        else dcfsimpy.ResultsWriter(backoffs, "run_changing_payload")
+    )
+    __run_points(
+        points,
+        runs,
+        seed,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        no_cache,
+        target_ci,
+        max_runs,
+        metrics,
+        common_random_numbers,
+        time_series,
+        delays,
+        queue,
+        lease_timeout,
+    )
     if not skip_results:
-        path = dcfsimpy.save_results(results, backoffs, "run_changing_payload")
-        dcfsimpy.show_results_changing_payload(path)
+        path = results.close()
+        dcfsimpy.report(path, workers, update_reference=True)
 
 
 @cli.command()
@@ -397,6 +841,74 @@ def run_changing_payload(
     is_flag=True,
     help="If provided, results are not saved.",
 )
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--trace",
+    "trace",
+    default=0,
+    help="Number of last simulation events to keep and save, 0 disables tracing.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--traffic",
+    "traffic",
+    type=click.Choice(dcfsimpy.TRAFFIC),
+    default="saturated",
+    help="Arrival process of frames of every station.",
+)
+@click.option(
+    "--load",
+    "load",
+    default=0.0,
+    help="Offered load of every station in Mb/s, during on periods for on-off.",
+)
+@click.option(
+    "--queue-size",
+    "queue_size",
+    default=100,
+    help="Frames queued by a station with unsaturated traffic.",
+)
+@click.option(
+    "--on-time", "on_time", default=0.01, help="Mean on period of on-off traffic in s."
+)
+@click.option(
+    "--off-time",
+    "off_time",
+    default=0.01,
+    help="Mean off period of on-off traffic in s.",
+)
 def single_run(
     seed: int,
     stations_number: int,
@@ -407,28 +919,815 @@ def single_run(
     r_limit: int,
     payload_size: int,
     mcs_value: int,
+    engine: str,
+    trace: int,
+    no_cache: bool,
+    metrics: bool,
+    time_series: Optional[float],
+    delays: bool,
+    traffic: str,
+    load: float,
+    queue_size: int,
+    on_time: float,
+    off_time: float,
 ):
-    results = dict()
-    backoffs = {key: {stations_number: 0} for key in range(cw_max + 1)}
-    dcfsimpy.run_simulation(
+    tracer = dcfsimpy.Tracer(trace) if trace > 0 else None
+    job = dcfsimpy.Job(
         stations_number,
         seed,
         simulation_time,
+        dcfsimpy.Config(
+            payload_size,
+            cw_min,
+            cw_max,
+            r_limit,
+            mcs_value,
+            traffic,
+            load,
+            queue_size,
+            on_time,
+            off_time,
+        ),
+        engine,
+    )
+    cache = None if no_cache else dcfsimpy.ResultCache()
+    results, backoffs = dcfsimpy.run_job(
+        job, skip_results, tracer, cache, metrics, time_series, delays
+    )
+
+    if not skip_results:
+        path = dcfsimpy.save_results(results, backoffs, "single_run")
+        if tracer is not None:
+            with open(f"{path}trace.csv", "w") as file:
+                tracer.dump(file)
+    elif tracer is not None:
+        tracer.dump()
+
+
+@cli.command()
+@click.option(
+    "--stations-number",
+    "stations_number",
+    type=int,
+    required=True,
+    help="Number of stations.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    default=0.01,
+    help="Maximal half widths of 95% confidence intervals of THR and P_COLL"
+    " as a part of their means.",
+)
+@click.option(
+    "-t",
+    "--max-simulation-time",
+    "max_simulation_time",
+    default=100.0,
+    help="Maximal duration of the simulation in s.",
+)
+@click.option(
+    "--chunk-time",
+    "chunk_time",
+    default=0.1,
+    help="Duration of the simulation between precision checks in s.",
+)
+@click.option("--batches", "batches", default=20, help="Number of batches.")
+@click.option(
+    "--payload-size", "payload_size", default=1472, help="Size of  payload in B."
+)
+@click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+@click.option("--cw-min", "cw_min", default=15, help="Size of cw min.")
+@click.option("--cw-max", "cw_max", default=1023, help="Size of cw max.")
+@click.option(
+    "--r-limit", "r_limit", default=7, help="Number of failed transmissions in a row."
+)
+@click.option("--seed", default=1, help="Seed for simulation.")
+@click.option(
+    "-s",
+    "--skip-results",
+    "skip_results",
+    is_flag=True,
+    help="If provided, results are not saved.",
+)
+def batch_means_run(
+    seed: int,
+    stations_number: int,
+    target_ci: float,
+    max_simulation_time: float,
+    chunk_time: float,
+    batches: int,
+    skip_results: bool,
+    cw_min: int,
+    cw_max: int,
+    r_limit: int,
+    payload_size: int,
+    mcs_value: int,
+):
+    config = dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value)
+    backoffs = dcfsimpy.BackoffHistogram(cw_max, [stations_number])
+    results = dict()
+    dcfsimpy.run_batch_means(
+        stations_number,
+        seed,
+        skip_results,
+        config,
+        backoffs,
+        results,
+        target_ci,
+        max_simulation_time,
+        chunk_time,
+        batches,
+    )
+    if not skip_results:
+        dcfsimpy.save_results(results, backoffs, "batch_means_run")
+
+
+@cli.command()
+@click.option(
+    "--stations-number",
+    "stations_number",
+    default=1000,
+    help="Number of stations.",
+)
+@click.option(
+    "-t",
+    "--simulation-time",
+    "simulation_time",
+    default=0.1,
+    help="Duration of the simulation in which frames are counted in s.",
+)
+def memory_benchmark(stations_number: int, simulation_time: float):
+    memory = dcfsimpy.measure_memory(stations_number, simulation_time)
+    print(
+        f"N={stations_number} BYTES PER STATION: {memory['BYTES_PER_STATION']:.0f} "
+        f"FRAMES ALLOCATED: {memory['FRAMES_ALLOCATED']} "
+        f"FRAMES PER SECOND: {memory['FRAMES_PER_SECOND']:.0f}"
+    )
+
+
+@cli.command()
+@click.option(
+    "--engine",
+    "engines",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    multiple=True,
+    help="Engine to benchmark, can be used many times, all engines by default.",
+)
+@click.option(
+    "-t",
+    "--simulation-time",
+    "simulation_time",
+    default=1.0,
+    help="Duration of the simulation of every case in s.",
+)
+@click.option(
+    "--repeat",
+    "repeat",
+    default=3,
+    help="Number of runs of every case, the fastest one is reported.",
+)
+@click.option(
+    "--compare",
+    "compare",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Previous benchmark.json to compare with.",
+)
+@click.option(
+    "--threshold",
+    "threshold",
+    default=0.2,
+    help="Part of the previous wall time by which a case can be slower.",
+)
+@click.option(
+    "-s",
+    "--skip-results",
+    "skip_results",
+    is_flag=True,
+    help="If provided, results are not saved.",
+)
+def benchmark(
+    engines: Tuple[str],
+    simulation_time: float,
+    repeat: int,
+    compare: Optional[str],
+    threshold: float,
+    skip_results: bool,
+):
+    engines = list(engines) or dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES
+    results = dcfsimpy.run_benchmark(engines, simulation_time, repeat)
+    startup = results["STARTUP"]
+    print(
+        f"IMPORT TIME: {startup['IMPORT_TIME']:.3f} s "
+        f"HEAVY MODULES: {', '.join(startup['LOADED_MODULES']) or '-'}"
+    )
+    for case in results["CASES"]:
+        events = "-" if case["EVENTS"] is None else case["EVENTS"]
+        print(
+            f"{case['ENGINE']} N={case['N_OF_STATIONS']} PAYLOAD = {case['PAYLOAD']} "
+            f"MCS = {case['MCS']} WALL TIME: {case['WALL_TIME']:.3f} s "
+            f"EVENTS: {events} TX/S: {case['TRANSMISSIONS_PER_SECOND']:.0f} "
+            f"SIMULATED/WALL: {case['SIMULATED_TO_WALL']:.2f} "
+            f"PEAK RSS: {case['PEAK_RSS'] / 1048576:.1f} MiB"
+        )
+    if not skip_results:
+        path = f"{os.getcwd()}/results/{datetime.now().strftime('%Y-%m-%d-%H-%M-%s')}-benchmark/"
+        os.makedirs(path)
+        dcfsimpy.save_benchmark(results, f"{path}benchmark.json")
+        print(f"Saved to {path}benchmark.json")
+    if compare is not None:
+        regressions = dcfsimpy.compare_benchmarks(
+            dcfsimpy.load_benchmark(compare), results, threshold
+        )
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            raise click.ClickException(
+                f"{len(regressions)} cases slower by more than {threshold:.0%}."
+            )
+
+
+@cli.command()
+@click.option(
+    "--stations-start",
+    "stations_start",
+    default=1,
+    help="Starting number of stations.",
+)
+@click.option(
+    "--stations-end",
+    "stations_end",
+    default=10,
+    help="Ending number of stations.",
+)
+@click.option(
+    "-p", "--payload-size", "payload_size", default=1472, help="Size of payload in B."
+)
+@click.option("--cw-min", "cw_min", default=15, help="Size of cw min.")
+@click.option("--cw-max", "cw_max", default=1023, help="Size of cw max.")
+@click.option(
+    "--r-limit", "r_limit", default=7, help="Number of failed transmissions in a row."
+)
+@click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+def analytical_model(
+    stations_start: int,
+    stations_end: int,
+    payload_size: int,
+    cw_min: int,
+    cw_max: int,
+    r_limit: int,
+    mcs_value: int,
+):
+    stations = range(stations_start, stations_end + 1)
+    analytical = dcfsimpy.solve_bianchi(
+        list(stations), cw_min, cw_max, r_limit, payload_size, mcs_value
+    )
+    for n, thr, p_coll in zip(stations, analytical.thr, analytical.p_coll):
+        print(
+            f"N={n} CW_MIN = {cw_min} CW_MAX = {cw_max}  PCOLL: {p_coll:.4f} THR: {thr}"
+        )
+
+
+@cli.command()
+@click.option(
+    "-r",
+    "--runs",
+    "runs",
+    default=3,
+    help="Runs of every cw in the first round, doubled for the best ones.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=10,
+    help="Maximal number of runs of every cw.",
+)
+@click.option(
+    "--stations-start",
+    "stations_start",
+    type=int,
+    required=True,
+    help="Starting number of stations.",
+)
+@click.option(
+    "--stations-end",
+    "stations_end",
+    required=True,
+    type=int,
+    help="Ending number of stations.",
+)
+@click.option(
+    "--stations-step",
+    "stations_step",
+    default=5,
+    type=int,
+    help="Step number of stations.",
+)
+@click.option(
+    "-t",
+    "--simulation-time",
+    "simulation_time",
+    default=100.0,
+    help="Duration of the simulation per stations number in s.",
+)
+@click.option(
+    "-p", "--payload-size", "payload_size", default=1472, help="Size of payload in B."
+)
+@click.option("--cw-max", "cw_max", default=1023, help="Size of cw max.")
+@click.option(
+    "--optimize-cw-max",
+    "optimize_cw_max",
+    is_flag=True,
+    help="If provided, cw max up to --cw-max is optimized after cw min.",
+)
+@click.option(
+    "--common-random-numbers/--independent-runs",
+    "common_random_numbers",
+    default=True,
+    help="Run i of every cw uses the same seed and cw are compared by paired"
+    " differences (default), or all runs are independent.",
+)
+@click.option(
+    "--r-limit", "r_limit", default=7, help="Number of failed transmissions in a row."
+)
+@click.option("--seed", default=1, help="Seed for simulation.")
+@click.option(
+    "-s",
+    "--skip-results",
+    "skip_results",
+    is_flag=True,
+    help="If provided, results are not saved.",
+)
+@click.option("-m", "--mcs-value", "mcs_value", default=7, help="Value of mcs.")
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
+def optimize_cw(
+    runs: int,
+    max_runs: int,
+    seed: int,
+    stations_start: int,
+    stations_end: int,
+    stations_step: int,
+    simulation_time: int,
+    skip_results: bool,
+    cw_max: int,
+    optimize_cw_max: bool,
+    common_random_numbers: bool,
+    r_limit: int,
+    payload_size: int,
+    mcs_value: int,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    queue: Optional[str],
+    lease_timeout: float,
+):
+    stations = range(stations_start, stations_end + 1, stations_step)
+    backoffs = dcfsimpy.BackoffHistogram(cw_max, stations)
+    points = [
+        dcfsimpy.Job(
+            n,
+            0,
+            simulation_time,
+            dcfsimpy.Config(payload_size, 1, cw_max, r_limit, mcs_value),
+            engine,
+        )
+        for n in stations
+    ]
+    results = None if skip_results else dcfsimpy.ResultsWriter(backoffs, "optimize_cw")
+    cache = None if no_cache else dcfsimpy.ResultCache()
+    optima = dcfsimpy.optimize_cw(
+        points,
+        workers,
         skip_results,
-        dcfsimpy.Config(payload_size, cw_min, cw_max, r_limit, mcs_value),
         backoffs,
         results,
+        cache,
+        runs,
+        max_runs,
+        seed,
+        optimize_cw_max,
+        common_random_numbers,
+        queue=None if queue is None else dcfsimpy.JobQueue(queue, lease_timeout),
     )
+    rows = [["N_OF_STATIONS", "CW_MIN", "CW_MAX", "THR", "RUNS", "EVALUATIONS"]]
+    for point in points:
+        optimum = optima[dcfsimpy.point_key(point)]
+        print(
+            f"N={point.number_of_stations} CW_MIN = {optimum.cw_min} CW_MAX = {optimum.cw_max} "
+            f"THR: {optimum.thr} RUNS: {optimum.runs} "
+            f"EVALUATIONS: {optimum.evaluations} of {optimum.grid_evaluations}"
+        )
+        rows.append(
+            [
+                point.number_of_stations,
+                optimum.cw_min,
+                optimum.cw_max,
+                optimum.thr,
+                optimum.runs,
+                optimum.evaluations,
+            ]
+        )
+    evaluations = sum(optimum.evaluations for optimum in optima.values())
+    grid_evaluations = sum(optimum.grid_evaluations for optimum in optima.values())
+    print(f"EVALUATIONS: {evaluations} of {grid_evaluations} runs of the full grid")
+    if not skip_results:
+        path = results.close()
+        with open(f"{path}optimum.csv", "w", newline="") as file:
+            dcfsimpy.ResultsWriter.append(file, rows)
+
+
+def __parse_values(text: str, kind: type = int) -> List:
+    # "1,2,5" or an inclusive range "5:50:5", the step is 1 by default,
+    # floats can have ranges "0.5:2:0.5" too, strings only lists
+    try:
+        if ":" in text and kind is int:
+            start, stop, step = (text.split(":") + ["1"])[:3]
+            return list(range(int(start), int(stop) + 1, int(step)))
+        if ":" in text and kind is float:
+            start, stop, step = [
+                float(value) for value in (text.split(":") + ["1"])[:3]
+            ]
+            count = int((stop - start) / step + 1e-9) + 1
+            return [round(start + i * step, 9) for i in range(count)]
+        return [kind(value) for value in text.split(",")]
+    except (ValueError, ZeroDivisionError):
+        raise click.BadParameter(f"{text} is not a list or a range of {kind.__name__}.")
+
+
+def __parse_stations(ctx, param, value: str) -> List[int]:
+    return __parse_values(value)
+
+
+def __parse_parameters(ctx, param, value: Tuple[str]) -> Dict[str, List]:
+    # values are parsed with the type of the config field, unknown fields as int
+    # and rejected by sweep_points
+    kinds = {field.name: field.type for field in fields(dcfsimpy.Config)}
+    parameters = dict()
+    for parameter in value:
+        name, _, values = parameter.partition("=")
+        parameters[name] = __parse_values(values, kinds.get(name, int))
+    return parameters
 
+
+@cli.command()
+@click.option("-r", "--runs", "runs", default=10, help="Runs per point.")
+@click.option(
+    "-n",
+    "--stations",
+    "stations",
+    required=True,
+    callback=__parse_stations,
+    help="Numbers of stations, a list 1,5,10 or a range 5:50:5.",
+)
+@click.option(
+    "--param",
+    "parameters",
+    multiple=True,
+    callback=__parse_parameters,
+    help="Config field and its values, e.g. cw_min=7,15,31, data_size=100:2000:100,"
+    " load=0.5:2:0.5 or traffic=poisson,cbr, can be used many times, all"
+    " combinations are simulated.",
+)
+@click.option(
+    "-t",
+    "--simulation-time",
+    "simulation_time",
+    default=100.0,
+    help="Duration of the simulation per point in s.",
+)
+@click.option("--seed", default=1, help="Seed for simulation.")
+@click.option(
+    "-s",
+    "--skip-results",
+    "skip_results",
+    is_flag=True,
+    help="If provided, results are not saved.",
+)
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of worker processes, all cores by default.",
+)
+@click.option(
+    "--engine",
+    "engine",
+    type=click.Choice(dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES),
+    default="simpy",
+    help="Simulation engine, fast skips straight to the next transmission,"
+    " batch simulates all runs of a point together, from 20 runs.",
+)
+@click.option(
+    "--no-cache",
+    "no_cache",
+    is_flag=True,
+    help="If provided, cached results are not used and new ones are not stored.",
+)
+@click.option(
+    "--target-ci",
+    "target_ci",
+    type=float,
+    default=None,
+    help="If provided, runs are added until half widths of 95% confidence intervals"
+    " of THR and P_COLL are at most this part of their means, runs is the initial"
+    " number of runs.",
+)
+@click.option(
+    "--max-runs",
+    "max_runs",
+    default=100,
+    help="Maximal number of runs per point with target-ci.",
+)
+@click.option(
+    "--metrics",
+    "metrics",
+    is_flag=True,
+    help="If provided, counters of the simpy engine are saved to metrics.csv.",
+)
+@click.option(
+    "--common-random-numbers",
+    "common_random_numbers",
+    is_flag=True,
+    help="If provided, run i of every point uses the same seed, so differences"
+    " between points have lower variance.",
+)
+@click.option(
+    "--time-series",
+    "time_series",
+    type=click.FloatRange(min=dcfsimpy.TIME_SERIES_MIN_INTERVAL),
+    default=None,
+    help="If provided, bytes, successes and collisions of every station are saved"
+    " to time-series.npz in windows of this many s.",
+)
+@click.option(
+    "--delays",
+    "delays",
+    is_flag=True,
+    help="If provided, access delays and retries of sent frames are saved.",
+)
+@click.option(
+    "--traffic",
+    "traffic",
+    type=click.Choice(dcfsimpy.TRAFFIC),
+    default="saturated",
+    help="Arrival process of frames of every station.",
+)
+@click.option(
+    "--load",
+    "load",
+    default=0.0,
+    help="Offered load of every station in Mb/s, during on periods for on-off.",
+)
+@click.option(
+    "--queue-size",
+    "queue_size",
+    default=100,
+    help="Frames queued by a station with unsaturated traffic.",
+)
+@click.option(
+    "--on-time", "on_time", default=0.01, help="Mean on period of on-off traffic in s."
+)
+@click.option(
+    "--off-time",
+    "off_time",
+    default=0.01,
+    help="Mean off period of on-off traffic in s.",
+)
+@click.option(
+    "--queue",
+    "queue",
+    default=None,
+    help="If provided, jobs are published to this shared directory and run by"
+    " worker commands on this host or others instead of local processes.",
+)
+@click.option(
+    "--lease-timeout",
+    "lease_timeout",
+    default=300.0,
+    help="Time in s after which a job of a silent worker of --queue is run again.",
+)
+def sweep(
+    runs: int,
+    stations: List[int],
+    parameters: Dict[str, List[int]],
+    simulation_time: float,
+    seed: int,
+    skip_results: bool,
+    workers: Optional[int],
+    engine: str,
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    traffic: str,
+    load: float,
+    queue_size: int,
+    on_time: float,
+    off_time: float,
+    queue: Optional[str],
+    lease_timeout: float,
+):
+    try:
+        points = dcfsimpy.sweep_points(
+            stations,
+            parameters,
+            simulation_time,
+            engine,
+            dcfsimpy.Config(
+                traffic=traffic,
+                load=load,
+                queue_size=queue_size,
+                on_time=on_time,
+                off_time=off_time,
+            ),
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="--param")
+    backoffs = dcfsimpy.BackoffHistogram(
+        max(point.config.cw_max for point in points), stations
+    )
+    results = None if skip_results else dcfsimpy.ResultsWriter(backoffs, "sweep")
+    __run_points(
+        points,
+        runs,
+        seed,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        no_cache,
+        target_ci,
+        max_runs,
+        metrics,
+        common_random_numbers,
+        time_series,
+        delays,
+        queue,
+        lease_timeout,
+    )
     if not skip_results:
-        dcfsimpy.save_results(results, backoffs, "single_run")
+        print(f"Saved to {results.close()}")
+
+
+def __run_points(
+    points: List["dcfsimpy.Job"],
+    runs: int,
+    seed: int,
+    workers: Optional[int],
+    skip_results: bool,
+    backoffs: "dcfsimpy.BackoffHistogram",
+    results: Optional[dcfsimpy.ResultsWriter],
+    no_cache: bool,
+    target_ci: Optional[float],
+    max_runs: int,
+    metrics: bool,
+    common_random_numbers: bool,
+    time_series: Optional[float],
+    delays: bool,
+    queue: Optional[str],
+    lease_timeout: float,
+):
+    cache = None if no_cache else dcfsimpy.ResultCache()
+    job_queue = None if queue is None else dcfsimpy.JobQueue(queue, lease_timeout)
+    if target_ci is None:
+        jobs = dcfsimpy.replicate(points, runs, seed, 0, common_random_numbers)
+        dcfsimpy.run_jobs(
+            jobs,
+            workers,
+            skip_results,
+            backoffs,
+            results,
+            cache,
+            metrics,
+            time_series,
+            job_queue,
+            delays,
+        )
+        return
+    used_runs = dcfsimpy.run_until_precision(
+        points,
+        workers,
+        skip_results,
+        backoffs,
+        results,
+        cache,
+        runs,
+        max_runs,
+        target_ci,
+        seed,
+        metrics=metrics,
+        common_random_numbers=common_random_numbers,
+        time_series=time_series,
+        queue=job_queue,
+        delays=delays,
+    )
+    for point in points:
+        print(
+            f"N={point.number_of_stations} CW_MIN = {point.config.cw_min} "
+            f"PAYLOAD = {point.config.data_size} MCS = {point.config.mcs} "
+            f"RUNS: {used_runs[dcfsimpy.point_key(point)]}"
+        )
+
+
+@cli.command()
+@click.option(
+    "--queue",
+    "queue",
+    required=True,
+    help="Shared directory of the queue given to --queue of other commands.",
+)
+@click.option(
+    "--idle-timeout",
+    "idle_timeout",
+    type=float,
+    default=None,
+    help="If provided, the worker stops after this many s without jobs.",
+)
+def worker(queue: str, idle_timeout: Optional[float]):
+    done = dcfsimpy.run_worker(queue, idle_timeout)
+    print(f"Run {done} jobs")
+
+
+@cli.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(file_okay=False))
+@click.option(
+    "-w",
+    "--workers",
+    "workers",
+    default=None,
+    type=int,
+    help="Number of processes rendering figures, all cores by default.",
+)
+@click.option(
+    "--update-reference",
+    "update_reference",
+    is_flag=True,
+    help="If provided, results of changing stations are appended to the tables"
+    " in reference-data.",
+)
+def report(paths: Tuple[str], workers: Optional[int], update_reference: bool):
+    for path in paths:
+        figures = dcfsimpy.report(path, workers, update_reference)
+        print(f"Saved results-mean.csv and {figures} figures to {path}")
 
 
-def __start_threads(threads: List[threading.Thread]):
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+@cli.command()
+@click.option(
+    "--max-size", "max_size", type=float, default=None, help="Maximal cache size in MB."
+)
+@click.option(
+    "--max-age",
+    "max_age",
+    type=float,
+    default=None,
+    help="Maximal time in days since a cached result was last used.",
+)
+def prune_cache(max_size: Optional[float], max_age: Optional[float]):
+    removed, removed_size = dcfsimpy.ResultCache().prune(
+        None if max_size is None else max_size * 1000000,
+        None if max_age is None else max_age * 24 * 60 * 60,
+    )
+    print(f"Removed {removed} cached results, {removed_size / 1000000:.2f} MB")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+from typing import Iterable, List, TextIO, Union
+
+import numpy as np
+
+
+class BackoffHistogram:
+    """Number of draws of every back off value for every number of stations.
+
+    A run counts its draws in a plain list from ``run_counter`` (the cheapest
+    item increment in Python) and adds it with ``add`` when it ends. Histograms
+    of separate runs or processes are merged by vector addition.
+    """
+
+    def __init__(self, cw_max: int, stations: Iterable[int] = ()):
+        self.cw_max = cw_max
+        self.stations = []  # number of stations of every row
+        self.counts = np.zeros((0, cw_max + 1), dtype=np.int64)
+        for n in stations:
+            self._row(n)
+
+    def _row(self, n: int) -> int:
+        if n not in self.stations:
+            self.stations.append(n)
+            self.counts = np.vstack(
+                [self.counts, np.zeros((1, self.cw_max + 1), dtype=np.int64)]
+            )
+        return self.stations.index(n)
+
+    def run_counter(self) -> List[int]:
+        return [0] * (self.cw_max + 1)
+
+    def add(self, n: int, counts: Union[List[int], np.ndarray]) -> None:
+        row = self._row(n)  # before indexing, adding a row replaces counts
+        self.counts[row] += np.asarray(counts, dtype=np.int64)
+
+    def merge(self, other: "BackoffHistogram") -> None:
+        # histograms of a smaller cw max fill only the first back off values
+        if other.cw_max > self.cw_max:
+            raise ValueError(
+                f"Cannot merge histograms with cw max {self.cw_max} and {other.cw_max}."
+            )
+        for n, counts in zip(other.stations, other.counts):
+            row = self._row(n)
+            self.counts[row, : other.cw_max + 1] += counts
+
+    def total(self, n: int) -> np.ndarray:
+        return self.counts[self._row(n)]
+
+    def to_csv(self, file: Union[str, TextIO]) -> None:
+        # one column per back off value and one row per number of stations
+        import pandas as pd
+
+        pd.DataFrame(self.counts, columns=range(self.cw_max + 1)).to_csv(
+            file, index=False
+        )
@@ -0,0 +1,251 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .Backoffs import BackoffHistogram
+from .DcfFunction import Config, report_simulation
+from .Delays import DELAY_MULTIPLIER, ChannelDelays, DelaySketch
+from .FastDcf import FastChannel
+from .TimeSeries import TIME_SERIES_COUNTERS, ChannelTimeSeries
+from .Times import *
+
+CHUNK_STEPS = 1024  # steps between bincounts of transmissions
+
+
+@dataclass()
+class BatchCounts:
+    """Counts of all replications by seed, flat for bincount."""
+
+    histogram: np.ndarray  # back off draws
+    succeeded: np.ndarray  # succeeded transmissions
+    failed: np.ndarray  # failed transmissions
+    delays: np.ndarray  # (seeds, delay buckets)
+    delay_totals: np.ndarray  # sums of delays
+    retries: np.ndarray  # (seeds, retransmissions + dropped)
+    series: Optional[np.ndarray]  # (seeds, windows, stations + 1, counters)
+
+
+def run_batched_simulation(
+    number_of_stations: int,
+    seeds: List[int],
+    simulation_time: int,
+    skip_results: bool,
+    config: Config,
+    backoffs: BackoffHistogram,
+    results: Dict[str, List[str]],
+    time_series: Optional[float] = None,
+    delays: bool = False,
+):
+    """Simulate one replication per seed of the saturated DCF model at once.
+
+    State of all replications is kept in (R, N) arrays, every step handles the
+    next transmission of every replication. Like in run_fast_simulation, back off
+    deadlines are kept relative to an offset of every replication, so a busy
+    period moves the offset instead of all frozen deadlines. Stations in ack
+    timeout are listed in ``returning`` until they start counting down. Back off
+    draws, delays and retries (only with delays) and time series are collected in
+    chunks of steps and counted with one bincount per chunk. Finished replications
+    are removed from the arrays. The model is the same as in run_fast_simulation,
+    but random numbers come from one NumPy generator seeded with all seeds, so
+    single rows differ from other engines. Every step costs a fixed number of NumPy
+    calls whatever the number of seeds, so the engine is faster than running the
+    fast one for every seed only from about BATCH_MIN_SEEDS seeds.
+    """
+    if config.traffic != "saturated":
+        raise ValueError("Engine batch simulates saturated traffic only.")
+    rng = np.random.default_rng(list(seeds))
+    airtime = get_airtime(config.data_size, config.mcs)
+    frame_time = airtime.ppdu_frame_time
+    ack_time = airtime.ack_frame_time
+    until = simulation_time * 1000000
+    replications = len(seeds)
+    shape = (replications, number_of_stations)
+    spans = np.array(
+        [
+            min(pow(2, stage) * (config.cw_min + 1) - 1, config.cw_max) + 1
+            for stage in range(config.r_limit + 1)
+        ]
+    )  # numbers of back off values by retransmissions of the frame
+    next_stages = np.roll(np.arange(config.r_limit + 1), -1)  # after a loss, 0 drops
+    delay_buckets = int(np.log(until) * DELAY_MULTIPLIER) + 2  # delays below until
+    chunk = []  # arrays of transmissions of every step since the last flush
+    counts = BatchCounts(
+        np.zeros(config.cw_max + 1, dtype=np.int64),
+        np.zeros(replications, dtype=np.int64),
+        np.zeros(replications, dtype=np.int64),
+        np.zeros(replications * delay_buckets, dtype=np.int64),
+        np.zeros(replications),
+        np.zeros(replications * (config.r_limit + 2), dtype=np.int64),
+        None,
+    )
+    if time_series is not None:
+        windows = ChannelTimeSeries.create(
+            time_series, simulation_time, number_of_stations
+        )  # interval and shape of every replication
+        counts.series = np.zeros(
+            (replications,) + windows.counts.shape, dtype=np.int64
+        ).reshape(-1)
+
+    def flush() -> None:
+        # counts of transmissions of the chunk, by the seed of every row
+        if not chunk:
+            return
+        rows, stations, ends, begun, stages, sent, drawn, started = (
+            np.concatenate(column) for column in zip(*chunk)
+        )
+        chunk.clear()
+        counts.histogram += np.bincount(
+            drawn[started < until], minlength=config.cw_max + 1
+        )
+        seeds = ids[rows]
+        counts.succeeded += np.bincount(seeds[sent], minlength=replications)
+        counts.failed += np.bincount(seeds[~sent], minlength=replications)
+        if delays:
+            frame_delays = (ends - begun)[sent]
+            buckets = (np.log(frame_delays) * DELAY_MULTIPLIER).astype(np.int64) + 1
+            counts.delays += np.bincount(
+                seeds[sent] * delay_buckets + buckets, minlength=len(counts.delays)
+            )
+            counts.delay_totals += np.bincount(
+                seeds[sent], weights=frame_delays, minlength=replications
+            )
+            # sent frames by retransmissions, frames lost at the retry limit dropped
+            counted = sent | (stages == config.r_limit)
+            counts.retries += np.bincount(
+                seeds[counted] * (config.r_limit + 2)
+                + stages[counted]
+                + ~sent[counted],
+                minlength=len(counts.retries),
+            )
+        if time_series is not None:
+            cells = (
+                (seeds * len(windows.counts) + ends // windows.interval)
+                * (number_of_stations + 1)
+                + stations
+                + 1
+            ) * len(TIME_SERIES_COUNTERS)
+            counts.series += np.bincount(
+                np.concatenate([cells[sent], cells[sent] + 1, cells[~sent] + 2]),
+                weights=np.concatenate(
+                    [
+                        np.full(sent.sum(), config.data_size),
+                        np.ones(sent.sum()),
+                        np.ones(len(sent) - sent.sum()),
+                    ]
+                ),
+                minlength=len(counts.series),
+            ).astype(np.int64)
+
+    ids = np.arange(replications)  # seed of every row
+    rows = np.arange(replications)
+    retransmissions = np.zeros(shape, dtype=np.int64)  # also the back off stage
+    frame_start = np.zeros(shape, dtype=np.int64)  # generation of the current frame
+    drawn = (rng.random(shape) * spans[retransmissions]).astype(np.int64)
+    counts.histogram += np.bincount(drawn.ravel(), minlength=config.cw_max + 1)
+    deadline = Times.t_difs + drawn * Times.t_slot  # relative to offset
+    offset = np.zeros(replications, dtype=np.int64)
+    returning = np.zeros((4, 0), dtype=np.int64)  # rows: row, station, time, back off
+
+    while len(rows):
+        first = deadline.min(axis=1)
+        t_start = first + offset
+        t_end = t_start + frame_time
+        if t_end.max() >= until:
+            # replications whose next frame ends after the simulation time are done
+            flush()
+            kept = (t_end < until).nonzero()[0]
+            moved = np.full(len(rows), -1)
+            moved[kept] = np.arange(len(kept))
+            returning = returning[:, moved[returning[0]] >= 0]
+            returning[0] = moved[returning[0]]
+            ids, deadline, offset = ids[kept], deadline[kept], offset[kept]
+            retransmissions, frame_start = retransmissions[kept], frame_start[kept]
+            rows = np.arange(len(kept))
+            continue
+        transmitting = deadline == first[:, None]
+        success = transmitting.sum(axis=1) == 1
+        t_idle = t_end + success * ack_time
+        # frozen back offs lose the slot in which the channel got busy
+        offset += t_idle - t_start + (Times.t_difs - Times.t_slot)
+        if returning.shape[1]:
+            # stations back from ack timeout before the transmission count down,
+            # stations coming back when it starts or during it wait for idle
+            # channel, later ones keep their deadline
+            returning = returning[:, returning[2] >= t_start[returning[0]]]
+            row, station, t_return, back_off = returning
+            idle = t_idle[row]
+            deadline[row, station] = np.maximum(t_return, idle) + back_off - offset[row]
+            returning = returning[:, t_return >= idle]
+
+        # transmitting stations draw the next back off, after ack timeout if lost,
+        # frames are replaced after success or r limit retransmissions
+        tx_rows, tx_stations = transmitting.nonzero()
+        sent = success[tx_rows]
+        ends = t_end[tx_rows]
+        stages = retransmissions[tx_rows, tx_stations]
+        started = ends + np.where(sent, ack_time, airtime.ack_timeout)
+        new_stages = np.where(sent, 0, next_stages[stages])
+        retransmissions[tx_rows, tx_stations] = new_stages
+        begun = ends  # generation of frames, used by delays only
+        if delays:
+            begun = frame_start[tx_rows, tx_stations]
+            frame_start[tx_rows, tx_stations] = np.where(
+                new_stages == 0, np.where(sent, started, ends), begun
+            )
+        drawn = (rng.random(len(sent)) * spans[new_stages]).astype(np.int64)
+        back_off = Times.t_difs + drawn * Times.t_slot
+        deadline[tx_rows, tx_stations] = started + back_off - offset[tx_rows]
+        chunk.append((tx_rows, tx_stations, ends, begun, stages, sent, drawn, started))
+        if not sent.all():
+            lost = ~sent
+            returning = np.concatenate(
+                [
+                    returning,
+                    [tx_rows[lost], tx_stations[lost], started[lost], back_off[lost]],
+                ],
+                axis=1,
+            )
+        if len(chunk) == CHUNK_STEPS:
+            flush()
+
+    flush()
+    backoffs.add(number_of_stations, counts.histogram)
+    delay_counts = counts.delays.reshape(replications, delay_buckets)
+    retries = counts.retries.reshape(replications, config.r_limit + 2)
+    if time_series is not None:
+        series = counts.series.reshape((replications,) + windows.counts.shape)
+    for i, seed in enumerate(seeds):
+        succeeded, failed = int(counts.succeeded[i]), int(counts.failed[i])
+        channel = FastChannel(
+            number_of_stations,
+            [],
+            failed,
+            succeeded,
+            succeeded * config.data_size,
+            ChannelDelays(config.r_limit) if delays else None,
+            (
+                None
+                if time_series is None
+                else ChannelTimeSeries(windows.interval, series[i])
+            ),
+        )
+        if delays:
+            station = channel.delays.station()  # stations of a replication together
+            buckets = np.nonzero(delay_counts[i])[0]
+            if len(buckets):
+                station.delays = DelaySketch(
+                    int(buckets[0]),
+                    delay_counts[i, buckets[0] : buckets[-1] + 1].tolist(),
+                    float(counts.delay_totals[i]),
+                )
+            station.retries = retries[i].tolist()
+        report_simulation(
+            channel,
+            number_of_stations,
+            seed,
+            simulation_time,
+            skip_results,
+            config,
+            results,
+        )
@@ -0,0 +1,144 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .Backoffs import BackoffHistogram
+from .DcfFunction import Config, create_simulation, report_simulation
+from .FastDcf import FastChannel
+from .Precision import half_width
+
+
+def mser_truncation(values: np.ndarray, group: int = 5) -> Optional[int]:
+    # MSER-5 warm-up length: values averaged in groups of 5, the truncation
+    # minimizing the squared deviations of the rest divided by its length squared,
+    # None if the minimum is not in the first half as the run is still too short
+    n = len(values) // group
+    if n < 4:
+        return None
+    means = np.asarray(values[: n * group], dtype=float).reshape(n, group).mean(axis=1)
+    rest = np.arange(n, 0, -1)[:-1]  # number of groups kept for every truncation
+    sums = np.cumsum(means[::-1])[::-1][:-1]
+    squares = np.cumsum(pow(means[::-1], 2))[::-1][:-1]
+    statistic = (squares - pow(sums, 2) / rest) / pow(rest, 2)
+    truncation = int(np.argmin(statistic))
+    if truncation > n // 2:
+        return None
+    return truncation * group
+
+
+def batch_means(
+    chunks: np.ndarray,
+    chunk_time: float,
+    batches: int,
+    warm_up: Optional[int] = None,
+    alpha: float = 0.05,
+) -> Optional[Tuple[int, np.ndarray, float, float, float, float]]:
+    """Steady state estimates from bytes, failed and succeeded counts of chunks.
+
+    Chunks of the warm-up are dropped, the rest is split into equal batches
+    (leftover chunks are added to the warm-up). Returns the number of dropped
+    chunks, summed counts of kept chunks, THR, its half width, P_COLL and its
+    half width, or None when the warm-up is not over or there are too few chunks.
+    """
+    if warm_up is None:
+        thr = chunks[:, 0]
+        p_coll = chunks[:, 1] / np.maximum(chunks[:, 1] + chunks[:, 2], 1)
+        truncations = [mser_truncation(thr), mser_truncation(p_coll)]
+        if None in truncations:
+            return None
+        warm_up = max(truncations)
+    size = (len(chunks) - warm_up) // batches
+    if size < 1:
+        return None
+    warm_up = len(chunks) - size * batches
+    batched = chunks[warm_up:].reshape(batches, size, 3).sum(axis=1)
+    thr = batched[:, 0] * 8 / (size * chunk_time * 1000000)
+    p_coll = batched[:, 1] / np.maximum(batched[:, 1] + batched[:, 2], 1)
+    totals = batched.sum(axis=0)
+    return (
+        warm_up,
+        totals,
+        thr.mean(),
+        half_width(thr, alpha),
+        totals[1] / max(totals[1] + totals[2], 1),
+        half_width(p_coll, alpha),
+    )
+
+
+def run_batch_means(
+    number_of_stations: int,
+    seed: int,
+    skip_results: bool,
+    config: Config,
+    backoffs: BackoffHistogram,
+    results: Dict[str, List],
+    target_ci: float,
+    max_simulation_time: float = 100.0,
+    chunk_time: float = 0.1,
+    batches: int = 20,
+    alpha: float = 0.05,
+) -> float:
+    """One long simulation stopped as soon as its steady state is known precisely.
+
+    The environment is advanced in chunks of chunk_time s. After every chunk the
+    warm-up is detected with MSER-5 on THR and P_COLL of chunks, the rest is split
+    into batches and the run stops when the confidence interval half widths of
+    batch means of THR and P_COLL are at most target_ci of their means, or after
+    max_simulation_time s. Reported THR and P_COLL skip the warm-up. Returns the
+    simulated time in s.
+    """
+    if max_simulation_time < 2 * batches * chunk_time:
+        raise ValueError(
+            f"Maximal simulation time has to fit at least {2 * batches} chunks."
+        )
+    environment, channel = create_simulation(number_of_stations, seed, config, backoffs)
+    chunks = []  # bytes sent, failed and succeeded transmissions of every chunk
+    previous = np.zeros(3, dtype=np.int64)
+    while True:
+        environment.run(until=(len(chunks) + 1) * chunk_time * 1000000)
+        current = np.array(
+            [
+                channel.bytes_sent,
+                channel.failed_transmissions,
+                channel.succeeded_transmissions,
+            ],
+            dtype=np.int64,
+        )
+        chunks.append(current - previous)
+        previous = current
+        estimate = batch_means(np.array(chunks), chunk_time, batches, alpha=alpha)
+        if estimate is not None:
+            _, _, thr, thr_width, p_coll, p_coll_width = estimate
+            if thr_width <= target_ci * thr and p_coll_width <= target_ci * p_coll:
+                break
+        if len(chunks) * chunk_time >= max_simulation_time:
+            logging.warning(
+                f"Precision not reached in {max_simulation_time} s for N={number_of_stations}."
+            )
+            if estimate is None:  # no warm-up found, the first half is dropped
+                estimate = batch_means(
+                    np.array(chunks), chunk_time, batches, len(chunks) // 2, alpha
+                )
+            break
+    backoffs.add(number_of_stations, channel.backoffs)
+    warm_up, totals, _, thr_width, _, p_coll_width = estimate
+    simulation_time = len(chunks) * chunk_time
+    print(
+        f"SIMULATED TIME: {simulation_time:.1f} s WARM-UP: {warm_up * chunk_time:.1f} s"
+    )
+    report_simulation(
+        FastChannel(number_of_stations, [], totals[1], totals[2], totals[0]),
+        number_of_stations,
+        seed,
+        (len(chunks) - warm_up) * chunk_time,
+        skip_results,
+        config,
+        results,
+    )
+    if not skip_results:
+        results.setdefault("SIMULATION_TIME", []).append(simulation_time)
+        results.setdefault("WARM_UP_TIME", []).append(warm_up * chunk_time)
+        results.setdefault("THR_HALF_WIDTH", []).append(thr_width)
+        results.setdefault("P_COLL_HALF_WIDTH", []).append(p_coll_width)
+    return simulation_time
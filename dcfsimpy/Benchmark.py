@@ -0,0 +1,256 @@
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from . import DcfFunction
+from .Backoffs import BackoffHistogram
+from .DcfFunction import Config, create_simulation
+from .Sweep import BATCH_ENGINES, ENGINES
+
+BENCHMARK_STATIONS = [1, 2, 5, 10, 50, 200]  # numbers of stations of every case
+BENCHMARK_CONFIGS = [
+    Config(data_size=1472, mcs=7),  # default long frames
+    Config(data_size=1472, mcs=0),  # long frames at the lowest rate
+    Config(data_size=100, mcs=7),  # short frames, the most transmissions
+]
+BENCHMARK_RUNS = 50  # replications simulated together by batched engines
+STARTUP_MODULES = [
+    "numpy",
+    "pandas",
+    "scipy",
+    "matplotlib",
+]  # not loaded by import dcfsimpy, only by the first use of what needs them
+
+
+def measure_memory(
+    number_of_stations: int = 1000, simulation_time: float = 0.1, seed: int = 1
+) -> Dict[str, float]:
+    """Memory of a SimPy simulation and frames it allocates while running.
+
+    Bytes per station are measured with tracemalloc after all station processes
+    started, frames are counted for the next simulation_time s of the simulation.
+    """
+    frame_init = DcfFunction.Frame.__init__
+    frames = 0
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal frames
+        frames += 1
+        frame_init(self, *args, **kwargs)
+
+    tracemalloc.start()
+    try:
+        empty = tracemalloc.get_traced_memory()[0]
+        environment, channel = create_simulation(
+            number_of_stations, seed, Config(), BackoffHistogram(Config().cw_max)
+        )
+        environment.run(until=1)  # start all station processes
+        used = tracemalloc.get_traced_memory()[0] - empty
+    finally:
+        tracemalloc.stop()
+    DcfFunction.Frame.__init__ = counting_init
+    try:
+        start = time.perf_counter()
+        environment.run(until=1 + simulation_time * 1000000)
+        duration = time.perf_counter() - start
+    finally:
+        DcfFunction.Frame.__init__ = frame_init
+    return {
+        "BYTES_PER_STATION": used / number_of_stations,
+        "FRAMES_ALLOCATED": frames,
+        "FRAMES_PER_SECOND": frames / duration,
+        "RUN_TIME": duration,
+    }
+
+
+def measure_startup(repeat: int = 5) -> Dict[str, object]:
+    """Time of import dcfsimpy in a new interpreter and heavy modules it loaded.
+
+    Every import runs in its own process, so nothing is cached in memory, the
+    fastest one is reported. Modules of STARTUP_MODULES loaded by the import
+    slow down the CLI and every worker process.
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import dcfsimpy\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(*[m for m in {STARTUP_MODULES!r} if m in sys.modules], sep=',')"
+    )
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [package] + environment.get("PYTHONPATH", "").split(os.pathsep)
+    )
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=environment,
+        ).stdout.split("\n")
+        times.append(float(output[0]))
+    return {
+        "IMPORT_TIME": min(times),
+        "LOADED_MODULES": [module for module in output[1].split(",") if module],
+    }
+
+
+def benchmark_case(
+    engine: str,
+    number_of_stations: int,
+    config: Config,
+    simulation_time: float,
+    repeat: int = 3,
+) -> Dict:
+    # run in a separate process, so the peak RSS belongs to this case only,
+    # the shortest of repeated runs is used as the least disturbed one
+    case = min(
+        (
+            run_benchmark_case(engine, number_of_stations, config, simulation_time)
+            for _ in range(repeat)
+        ),
+        key=lambda case: case["WALL_TIME"],
+    )
+    case["PEAK_RSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return case
+
+
+def run_benchmark_case(
+    engine: str, number_of_stations: int, config: Config, simulation_time: float
+) -> Dict:
+    backoffs = BackoffHistogram(config.cw_max)
+    results = dict()
+    events = None  # SimPy events, only the simpy engine has them
+    runs = 1
+    start = time.perf_counter()
+    if engine == "simpy":
+        environment, channel = create_simulation(
+            number_of_stations, 1, config, backoffs
+        )
+        until = simulation_time * 1000000
+        events = 0
+        while environment.peek() < until:
+            environment.step()
+            events += 1
+        transmissions = channel.failed_transmissions + channel.succeeded_transmissions
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):  # skip result lines
+            if engine in BATCH_ENGINES:
+                runs = BENCHMARK_RUNS
+                BATCH_ENGINES[engine](
+                    number_of_stations,
+                    list(range(1, runs + 1)),
+                    simulation_time,
+                    False,
+                    config,
+                    backoffs,
+                    results,
+                )
+            else:
+                ENGINES[engine](
+                    number_of_stations,
+                    1,
+                    simulation_time,
+                    False,
+                    config,
+                    backoffs,
+                    results,
+                )
+        transmissions = sum(results["FAILED_TRANSMISSIONS"]) + sum(
+            results["SUCCEEDED_TRANSMISSIONS"]
+        )
+    wall_time = time.perf_counter() - start
+    return {
+        "ENGINE": engine,
+        "N_OF_STATIONS": number_of_stations,
+        "PAYLOAD": config.data_size,
+        "MCS": config.mcs,
+        "RUNS": runs,
+        "WALL_TIME": wall_time,
+        "EVENTS": events,
+        "TRANSMISSIONS_PER_SECOND": transmissions / wall_time,
+        "SIMULATED_TO_WALL": runs * simulation_time / wall_time,
+    }
+
+
+def run_benchmark(
+    engines: List[str], simulation_time: float = 1.0, repeat: int = 3
+) -> Dict[str, object]:
+    """Fixed matrix of numbers of stations, payloads, MCS and engines.
+
+    Every case runs alone in a new worker process, one after another, so wall
+    times are not disturbed by other cases and peak RSS is measured per case.
+    """
+    cases = [
+        (engine, n, config, simulation_time, repeat)
+        for engine in engines
+        for config in BENCHMARK_CONFIGS
+        for n in BENCHMARK_STATIONS
+    ]
+    measured = []
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for case in cases:
+            measured.append(executor.submit(benchmark_case, *case).result())
+    return {
+        "TIMESTAMP": time.time(),
+        "SIMULATION_TIME": simulation_time,
+        "REPEAT": repeat,
+        "CONFIGS": [asdict(config) for config in BENCHMARK_CONFIGS],
+        "STARTUP": measure_startup(),
+        "CASES": measured,
+    }
+
+
+def benchmark_key(case: Dict) -> tuple:
+    return case["ENGINE"], case["N_OF_STATIONS"], case["PAYLOAD"], case["MCS"]
+
+
+def compare_benchmarks(
+    old: Dict[str, object], new: Dict[str, object], threshold: float = 0.2
+) -> List[str]:
+    # cases whose wall time grew by more than threshold of the old one,
+    # wall times are compared per simulated second if simulation times differ
+    old_cases = {benchmark_key(case): case for case in old["CASES"]}
+    regressions = []
+    for case in new["CASES"]:
+        previous = old_cases.get(benchmark_key(case))
+        if previous is None:
+            continue
+        change = previous["SIMULATED_TO_WALL"] / case["SIMULATED_TO_WALL"] - 1
+        if change > threshold:
+            regressions.append(
+                f"{case['ENGINE']} N={case['N_OF_STATIONS']} PAYLOAD = {case['PAYLOAD']}"
+                f" MCS = {case['MCS']} is {change:.1%} slower"
+            )
+    startup = new.get("STARTUP")
+    if startup is not None and startup["LOADED_MODULES"]:
+        regressions.append(
+            f"import dcfsimpy loads {', '.join(startup['LOADED_MODULES'])}"
+        )
+    if startup is not None and "STARTUP" in old:
+        change = startup["IMPORT_TIME"] / old["STARTUP"]["IMPORT_TIME"] - 1
+        if change > threshold:
+            regressions.append(f"import dcfsimpy is {change:.1%} slower")
+    return regressions
+
+
+def save_benchmark(benchmark: Dict[str, object], file: str) -> None:
+    with open(file, "w") as f:
+        json.dump(benchmark, f, indent=2)
+
+
+def load_benchmark(file: str) -> Dict[str, object]:
+    with open(file) as f:
+        return json.load(f)
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .Times import Times, get_airtimes
+
+
+@dataclass(frozen=True)
+class AnalyticalResults:
+    tau: np.ndarray  # probability of transmitting in a slot
+    p_coll: np.ndarray  # collision probability of a transmitted frame
+    thr: np.ndarray  # saturation throughput [Mb/s]
+
+
+def solve_bianchi(
+    number_of_stations,
+    cw_min=15,
+    cw_max=1023,
+    r_limit=7,
+    payload=1472,
+    mcs=7,
+    iterations: int = 60,
+) -> AnalyticalResults:
+    """Bianchi fixed point model of saturated DCF with a retry limit.
+
+    All arguments can be arrays and are broadcast together, so whole grids of
+    parameters are solved at once. Back off stage i draws from
+    [0, min(2^i * (cw_min + 1) - 1, cw_max)] like Station does, a frame is
+    dropped after r_limit retransmissions. The fixed point of the transmission
+    probability tau is found by bisection, as tau - tau(p(tau)) is increasing.
+    A collision keeps the channel busy for the frame and the ACK timeout.
+    """
+    n, cw_min, cw_max, r_limit, payload, mcs = np.broadcast_arrays(
+        number_of_stations, cw_min, cw_max, r_limit, payload, mcs
+    )
+    stages = np.arange(int(r_limit.max()) + 1).reshape((-1,) + (1,) * n.ndim)
+    used = stages <= r_limit  # stages before the frame is dropped
+    windows = np.minimum(pow(2, stages) * (cw_min + 1), cw_max + 1)
+
+    def transmission_probability(p: np.ndarray) -> np.ndarray:
+        weights = np.where(used, pow(p, stages), 0)
+        return weights.sum(axis=0) / (weights * (windows + 1) / 2).sum(axis=0)
+
+    low = np.zeros(n.shape)
+    high = np.ones(n.shape)
+    for _ in range(iterations):
+        tau = (low + high) / 2
+        p = 1 - pow(1 - tau, n - 1)
+        too_high = tau > transmission_probability(p)
+        high = np.where(too_high, tau, high)
+        low = np.where(too_high, low, tau)
+    tau = (low + high) / 2
+    p = 1 - pow(1 - tau, n - 1)
+    airtime = get_airtimes(payload, mcs)
+    t_success = airtime.ppdu_frame_time + airtime.ack_frame_time + Times.t_difs
+    t_collision = airtime.ppdu_frame_time + airtime.ack_timeout + Times.t_difs
+    p_idle = pow(1 - tau, n)
+    p_success = n * tau * pow(1 - tau, n - 1)
+    slot = (
+        p_idle * Times.t_slot
+        + p_success * t_success
+        + (1 - p_idle - p_success) * t_collision
+    )  # mean duration of a slot [us]
+    return AnalyticalResults(tau, p, p_success * payload * 8 / slot)
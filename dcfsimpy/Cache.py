@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .Backoffs import BackoffHistogram
+
+
+class ResultCache:
+    """Results of finished jobs stored on disk, one JSON file per job.
+
+    The file name is a hash of the job (number of stations, seed or seeds,
+    simulation time, all Config fields and engine) and of the engine version, so
+    changing any of them gives a new entry. Reading an entry refreshes its
+    modification time, which is used as the last use time by prune.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or f"{os.getcwd()}/cache/"
+
+    def key(self, job, version: int) -> str:
+        description = {"job": type(job).__name__, "version": version, **asdict(job)}
+        return hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode()
+        ).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return f"{self.path}{key}.json"
+
+    def get(
+        self, job, version: int
+    ) -> Optional[Tuple[Dict[str, List], BackoffHistogram]]:
+        file = self._file(self.key(job, version))
+        try:
+            with open(file) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(file)
+        results = entry["results"]
+        if "TIMESTAMP" in results:
+            results["TIMESTAMP"] = [
+                datetime.fromisoformat(value) for value in results["TIMESTAMP"]
+            ]
+        backoffs = BackoffHistogram(job.config.cw_max)
+        counts = backoffs.run_counter()
+        for back_off, count in entry["backoffs"].items():
+            counts[int(back_off)] = count
+        backoffs.add(job.number_of_stations, counts)
+        return results, backoffs
+
+    def put(
+        self,
+        job,
+        version: int,
+        results: Dict[str, List],
+        backoffs: BackoffHistogram,
+    ) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        results = dict(results)
+        if "TIMESTAMP" in results:
+            results["TIMESTAMP"] = [value.isoformat() for value in results["TIMESTAMP"]]
+        counts = backoffs.total(job.number_of_stations)
+        entry = {
+            "results": results,
+            "backoffs": {
+                str(back_off): int(counts[back_off]) for back_off in counts.nonzero()[0]
+            },
+        }
+        file = self._file(self.key(job, version))
+        with open(f"{file}.{os.getpid()}.tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(f"{file}.{os.getpid()}.tmp", file)
+
+    def prune(
+        self, max_size: Optional[int] = None, max_age: Optional[float] = None
+    ) -> Tuple[int, int]:
+        # removes entries not used for max_age s, then the least recently used ones
+        # until the cache is not bigger than max_size B, returns removed files and B
+        if not os.path.isdir(self.path):
+            return 0, 0
+        entries = []
+        for name in os.listdir(self.path):
+            stat = os.stat(f"{self.path}{name}")
+            entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        removed, removed_size = 0, 0
+        for mtime, file_size, name in entries:
+            too_old = max_age is not None and time.time() - mtime > max_age
+            too_big = max_size is not None and size > max_size
+            if not too_old and not too_big:
+                continue
+            os.remove(f"{self.path}{name}")
+            size -= file_size
+            removed += 1
+            removed_size += file_size
+        return removed, removed_size
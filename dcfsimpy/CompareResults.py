@@ -1,74 +1,125 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import scipy.stats as st
 
+from .Bianchi import solve_bianchi
+from .Delays import DELAY_QUANTILES, merge_delay_sketches
 from .Times import *
 
 plt.close("all")
 MSE_NAMES = {0: "MSE-NS-3.30.1", 1: "MSE-NS-3.31", 2: "MSE-AM", 3: "MSE-MS"}
 results_thr = "reference-data/results_thr-24.csv"
 results_pcoll = "reference-data/results_p_coll-24.csv"
-
-
-def calculate_p_coll_mse(path, notes=""):
-    results = pd.read_csv(results_pcoll, delimiter=",")
-    results_dict = results.iloc[0:5, 0:10].to_dict()
-    new_results = pd.read_csv(f"{path}results.csv", delimiter=",").T
-    new_results = {
-        str(int(pair["N_OF_STATIONS"])): pair["P_COLL"]
-        for pair in new_results.to_dict().values()
-    }
+results_payload_ns3 = "csv_results/change_payload_ns3.csv"
+results_mcs_ns3 = "csv_results/change_mcs_ns3.csv"
+POINT_COLUMNS = [
+    "N_OF_STATIONS",
+    "CW_MIN",
+    "CW_MAX",
+    "PAYLOAD",
+    "MCS",
+    "TRAFFIC",
+    "LOAD",
+    "R_LIMIT",
+    "QUEUE_SIZE",
+    "ON_TIME",
+    "OFF_TIME",
+]  # results-mean.csv has one row for every combination of these present
+
+
+@dataclass(frozen=True)
+class ReportData:
+    """Files of a results directory, loaded once and shared by all figures."""
+
+    path: str  # results directory, ending with /
+    results: pd.DataFrame  # results.csv
+    results_mean: pd.DataFrame  # results-mean.csv, calculated if missing
+    backoffs: Optional[pd.DataFrame]  # backoffs.csv, None if missing
+
+    @classmethod
+    def load(cls, path: str) -> "ReportData":
+        results = pd.read_csv(f"{path}results.csv", delimiter=",")
+        file_mean = f"{path}results-mean.csv"
+        if os.path.exists(file_mean):
+            results_mean = pd.read_csv(file_mean, delimiter=",")
+        else:
+            results_mean = calculate_mean_and_std(results, file_mean)
+        backoffs = (
+            pd.read_csv(f"{path}backoffs.csv", delimiter=",")
+            if os.path.exists(f"{path}backoffs.csv")
+            else None
+        )
+        return cls(path, results, results_mean, backoffs)
+
+
+def reference_with_results(
+    reference: str, values: pd.Series, mse_count: int, notes: str = ""
+) -> pd.DataFrame:
+    # reference table with a DCF-SimPy row of values by number of stations and its
+    # MSE to the first mse_count rows, numbers of stations missing in either are
+    # left out
+    results = pd.read_csv(reference, delimiter=",")
+    keys = [key for key in results.columns[0:10] if int(key) in values]
+    new_results = {key: values[int(key)] for key in keys}
+    for i in range(mse_count):
+        mse = (
+            np.mean([pow(results.loc[i, key] - new_results[key], 2) for key in keys])
+            if keys
+            else np.nan
+        )
+        new_results[MSE_NAMES[i]] = "{:.2E}".format(mse)
     new_results["Name"] = "DCF-SimPy"
     new_results["Notes"] = notes
-    for i in range(4):
-        mse = 0
-        for key in results_dict.keys():
-            mse += pow(results_dict[key][i] - new_results[key], 2)
-        mse = mse / len(results_dict.keys())
-        new_results[MSE_NAMES[i]] = "{:.2E}".format(mse)
-    results = results.append(new_results, ignore_index=True)
-    results.to_csv(results_pcoll, index=False)
+    return pd.concat([results, pd.DataFrame([new_results])], ignore_index=True)
+
+
+def calculate_p_coll_mse(data: ReportData, notes="") -> pd.DataFrame:
+    # last run of every number of stations, like the reference rows
+    values = data.results.groupby("N_OF_STATIONS")["P_COLL"].last()
+    results = reference_with_results(results_pcoll, values, 4, notes)
+    print(
+        "\ncalculate_p_coll_mse\nMSE for DCF-SimPy vs:\nns-3.30.1: {}\nns-3.31: {}\nAnalitical model: {}\nMatlab simulation: {}".format(
+            *results.iloc[-1, 11:15].tolist()
+        )
+    )
+    return results
+
+
+def calculate_thr_mse(data: ReportData, notes="") -> pd.DataFrame:
+    values = data.results_mean.groupby("N_OF_STATIONS")["THR"].mean()
+    results = reference_with_results(results_thr, values, 3, notes)
+    print(
+        "\ncalculate_thr_mse\nMSE for DCF-SimPy vs:\nns-3.30.1: {}\nns-3.31: {}\nAnalitical model: {}".format(
+            *results.iloc[-1, 11:14].tolist()
+        )
+    )
+    return results
+
+
+def plot_p_coll_mse(results: pd.DataFrame, path: str):
     styles = ["*--", ".--", "1--", "|--", ".--"]
-    ax = results.iloc[[0, 1, 2, 3, -1], 0:10].T.plot(style=styles, lw=0.7, ms=8)
+    ax = (
+        results.iloc[[0, 1, 2, 3, -1], 0:10]
+        .astype(float)
+        .T.plot(style=styles, lw=0.7, ms=8)
+    )
     ax.set_xlabel("Number of stations")
     ax.set_ylabel("Collision probability")
     x_ticks = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
     ax.set_xticks(range(len(x_ticks)))
     ax.set_xticklabels(x_ticks)
     ax.legend(results.iloc[[0, 1, 2, 3, -1], 10].tolist())
-    print(
-        "\ncalculate_p_coll_mse\nMSE for DCF-SimPy vs:\nns-3.30.1: {}\nns-3.31: {}\nAnalitical model: {}\nMatlab simulation: {}".format(
-            *results.iloc[-1, 11:15].tolist()
-        )
-    )
     plt.savefig(f"{path}pdf/P_COLL_PER_STATION.pdf")
-    plt.show()
 
 
-def calculate_thr_mse(path, notes=""):
-    results = pd.read_csv(results_thr, delimiter=",")
-    results_dict = results.iloc[0:4, 0:10].to_dict()
-    new_results = pd.read_csv(f"{path}results-mean.csv", delimiter=",").T
-    new_results = {
-        str(int(pair["N_OF_STATIONS"])): pair["THR"]
-        for pair in new_results.to_dict().values()
-    }
-    new_results["Name"] = "DCF-SimPy"
-    new_results["Notes"] = notes
-
-    for i in range(3):
-        mse = 0
-        for key in results_dict.keys():
-            mse += pow(results_dict[key][i] - new_results[key], 2)
-        mse = mse / len(results_dict.keys())
-        new_results[MSE_NAMES[i]] = "{:.2E}".format(mse)
-    results = results.append(new_results, ignore_index=True)
-    results.to_csv(results_thr, index=False)
-    plt.figure()
-    ax = results.iloc[[0, 1, 2, -1], 0:10].T.plot(style="--o")
+def plot_thr_mse(results: pd.DataFrame, path: str):
+    ax = results.iloc[[0, 1, 2, -1], 0:10].astype(float).T.plot(style="--o")
     ax.set_xlabel("Number of stations")
     ax.set_ylabel("Throughput [Mb/s]")
     ax.set_ylim(0, 35)
@@ -76,32 +127,19 @@ def calculate_thr_mse(path, notes=""):
     ax.set_xticks(range(len(x_ticks)))
     ax.set_xticklabels(x_ticks)
     ax.legend(results.iloc[[0, 1, 2, -1], 10].tolist())
-    print(
-        "\ncalculate_thr_mse\nMSE for DCF-SimPy vs:\nns-3.30.1: {}\nns-3.31: {}\nAnalitical model: {}".format(
-            *results.iloc[-1, 11:14].tolist()
-        )
-    )
     plt.savefig(f"{path}pdf/THR_PER_STATION.pdf")
-    plt.show()
-
-
-def calculate_thr_mse_stderr(path, notes=""):
-    results = pd.read_csv(results_thr, delimiter=",")
-    dcf_results = pd.read_csv(f"{path}results.csv", delimiter=",")
-    dcf_results.drop("TIMESTAMP", axis=1, inplace=True)
-    dcf_results.drop("CW_MIN", axis=1, inplace=True)
-    dcf_results.drop("CW_MAX", axis=1, inplace=True)
-    dcf_results.drop("SEED", axis=1, inplace=True)
-    dcf_results.drop("P_COLL", axis=1, inplace=True)
-    dcf_results.drop("FAILED_TRANSMISSIONS", axis=1, inplace=True)
-    dcf_results.drop("SUCCEEDED_TRANSMISSIONS", axis=1, inplace=True)
+
+
+def calculate_thr_mse_stderr(data: ReportData, results: pd.DataFrame):
+    plt.figure()
+    dcf_results = data.results.loc[:, ["N_OF_STATIONS", "THR"]]
     alpha = 0.05
     std = dcf_results.groupby("N_OF_STATIONS").std().loc[:, "THR"]
     n = dcf_results.groupby("N_OF_STATIONS").count().loc[:, "THR"]
     yerr = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
     dcf_results_mean = dcf_results.groupby(["N_OF_STATIONS"]).mean()
     plt.errorbar(
-        [i for i in range(0, 10)],
+        dcf_results_mean.index - 1,
         dcf_results_mean.loc[:, "THR"],
         yerr=yerr,
         fmt="--",
@@ -131,26 +169,24 @@ def calculate_thr_mse_stderr(path, notes=""):
     plt.errorbar(
         [i for i in range(0, 10)], ns_3_31_results_mean, yerr=yerr, fmt="--", capsize=4,
     )
-    plt.plot(results.iloc[2, 0:10].T, "--o")
+    plt.plot(results.iloc[2, 0:10].astype(float).T, "--o")
 
     plt.xlabel("Number of stations")
     plt.ylabel("Throughput [Mb/s]")
     plt.legend(results.iloc[[2, -1, 0, 1], 10].tolist())
-    plt.savefig(f"{path}pdf/THR_PER_STATION_ERR.pdf")
-    plt.show()
+    plt.savefig(f"{data.path}pdf/THR_PER_STATION_ERR.pdf")
 
 
-def plot_thr(times_thr, path):
+def plot_thr(times_thr, path, analytical_thr):
     times_thr = float("{:.4f}".format(times_thr))
-    # matlab_thr = 34.6014
-    matlab_thr = 37.0800
+    analytical_thr = float("{:.4f}".format(analytical_thr))
     ns_3_30_1_thr = 36.1225
     ns_3_31_thr = 36.1296
     # wifi_airtime_calculator = 35.0
     wifi_airtime_calculator = 37.0
     names = ["Analytical model", "DCF-SimPy", "Wi-Fi AirTime", "ns-3.30.1", "ns-3.31"]
     values = [
-        matlab_thr,
+        analytical_thr,
         times_thr,
         wifi_airtime_calculator,
         ns_3_30_1_thr,
@@ -161,32 +197,61 @@ def plot_thr(times_thr, path):
     plt.ylabel("Throughput [Mb/s]")
     plt.xticks(rotation=10)
     plt.savefig(f"{path}pdf/THR_Comparison.pdf")
-    plt.show()
 
 
-def calculate_mean_and_std(file, file_mean):
-    data = pd.read_csv(file, delimiter=",")
-    df = pd.DataFrame(data.groupby(["N_OF_STATIONS"]).mean())
-    df["THR_STD"] = data.groupby(["N_OF_STATIONS"])["THR"].std()
-    df.to_csv(file_mean)
+def calculate_mean_and_std(data: pd.DataFrame, file_mean: str) -> pd.DataFrame:
+    keys = [column for column in POINT_COLUMNS if column in data]
+    groups = data.groupby(keys, dropna=False)
+    df = pd.DataFrame(groups.mean(numeric_only=True))
+    df["THR_STD"] = groups["THR"].std()
+    df["RUNS"] = groups["THR"].count()
+    if "DELAY_SKETCH" in data:
+        # quantiles of frames of all runs instead of means of quantiles of runs
+        sketches = groups["DELAY_SKETCH"].agg(merge_delay_sketches)
+        for q in DELAY_QUANTILES:
+            df[f"DELAY_P{q * 100:g}"] = sketches.map(lambda sketch: sketch.quantile(q))
+    df = df.reset_index()
+    analytical = analytical_model(df)
+    # the model is of saturated stations, it does not apply to other traffic
+    saturated = df["TRAFFIC"].eq("saturated") if "TRAFFIC" in df else True
+    df["THR_ANALYTICAL"] = np.where(saturated, analytical.thr, np.nan)
+    df["P_COLL_ANALYTICAL"] = np.where(saturated, analytical.p_coll, np.nan)
+    df.to_csv(file_mean, index=False)
+    return df
+
+
+def analytical_model(results, r_limit=7):
+    # Bianchi model for every row of results, r_limit is used for results saved
+    # before R_LIMIT was
+    return solve_bianchi(
+        results.reset_index()["N_OF_STATIONS"].to_numpy(dtype=int),
+        results["CW_MIN"].to_numpy(dtype=int),
+        results["CW_MAX"].to_numpy(dtype=int),
+        results["R_LIMIT"].to_numpy(dtype=int) if "R_LIMIT" in results else r_limit,
+        results["PAYLOAD"].to_numpy(dtype=int),
+        results["MCS"].to_numpy(dtype=int),
+    )
 
 
-def show_backoffs(path):
+def show_backoffs(data: pd.DataFrame, path: str):
     plt.figure()
-    data = pd.read_csv(f"{path}backoffs.csv", delimiter=",")
-    ranges = [16, 32, 64, 128, 256, 512, 1024]
-    merged = {}
-    start = 0
-    for cw in ranges:
-        merged[f"[{start},{cw - 1}]"] = [sum(data.iloc[9, start:cw])]
-        start = cw
-    ax = data.iloc[9, :].plot(style=".", rot=90)
+    row = min(9, len(data) - 1)  # 10 stations, or the most in the run
+    ax = data.iloc[row, :].plot(style=".", rot=90)
     ax.set_xlabel("Backoff value")
     ax.set_ylabel("Frequency")
     ax.set_yscale("log")
     ax.set_xscale("linear")
     plt.savefig(f"{path}pdf/Backoffs.pdf")
-    plt.show()
+
+
+def show_backoffs_merged(data: pd.DataFrame, path: str):
+    row = min(9, len(data) - 1)
+    ranges = [16, 32, 64, 128, 256, 512, 1024]
+    merged = {}
+    start = 0
+    for cw in ranges:
+        merged[f"[{start},{cw - 1}]"] = [sum(data.iloc[row, start:cw])]
+        start = cw
     pd_merged = pd.DataFrame.from_dict(merged)
     plt.figure()
     ax = pd_merged.T.plot.bar(legend=False)
@@ -194,60 +259,68 @@ def show_backoffs(path):
     ax.set_xlabel("Backoff range")
     ax.set_ylabel("Frequency")
     plt.savefig(f"{path}pdf/BackoffsMerged.pdf")
-    plt.show()
 
 
-def show_payload(csv_name, file_mean, notes=""):
-    dcf_results = pd.read_csv(csv_name, delimiter=",")
-    dcf_results_mean = pd.read_csv(file_mean, delimiter=",")
-    ns3_df = pd.read_csv("csv_results/change_payload_ns3.csv")
-    ns3_results = pd.DataFrame(ns3_df.groupby(["PAYLOAD"]).mean())
+def show_payload(data: ReportData, notes=""):
+    dcf_results = data.results
+    dcf_results_mean = data.results_mean.groupby("PAYLOAD", as_index=False).mean(
+        numeric_only=True
+    )
+    plt.figure()
     alpha = 0.05
-    std = dcf_results.groupby("PAYLOAD").std().loc[:, "THR"]
+    std = dcf_results.groupby("PAYLOAD").std(numeric_only=True).loc[:, "THR"]
     n = dcf_results.groupby("PAYLOAD").count().loc[:, "THR"]
     yerr = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
     plt.errorbar(
         dcf_results_mean.PAYLOAD, dcf_results_mean.THR, yerr=yerr, fmt="--", capsize=4,
     )
-    dcf_results_mean["THR_NS3"] = ns3_results["THR"].tolist()
-    std = ns3_df.groupby("PAYLOAD").std().loc[:, "THR"]
-    n = ns3_df.groupby("PAYLOAD").count().loc[:, "THR"]
-    yerr = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
-    plt.errorbar(
-        dcf_results_mean.PAYLOAD,
-        dcf_results_mean.THR_NS3,
-        yerr=yerr,
-        fmt="--",
-        capsize=4,
-    )
+    legend = ["DCF-SimPy"]
+    if os.path.exists(results_payload_ns3):
+        ns3_df = pd.read_csv(results_payload_ns3)
+        ns3_results = pd.DataFrame(ns3_df.groupby(["PAYLOAD"]).mean())
+        dcf_results_mean["THR_NS3"] = ns3_results["THR"].tolist()
+        std = ns3_df.groupby("PAYLOAD").std().loc[:, "THR"]
+        n = ns3_df.groupby("PAYLOAD").count().loc[:, "THR"]
+        yerr = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
+        plt.errorbar(
+            dcf_results_mean.PAYLOAD,
+            dcf_results_mean.THR_NS3,
+            yerr=yerr,
+            fmt="--",
+            capsize=4,
+        )
+        legend.append("ns-3.31")
     plt.xlabel("Payload size [B]")
     plt.ylabel("Throughput [Mb/s]")
-    plt.legend(["DCF-SimPy", "ns-3.31"])
-    plt.savefig("pdf/CHANGING_PAYLOAD.pdf")
-    plt.show()
+    plt.legend(legend)
+    plt.savefig(f"{data.path}pdf/CHANGING_PAYLOAD.pdf")
 
 
-def show_mcs(csv_name, csv_mean, notes=""):
-    results = pd.read_csv(csv_name, delimiter=",")
-    dcf_results_mean = pd.read_csv(csv_mean, delimiter=",")
-    ns3_df = pd.read_csv("csv_results/change_mcs_ns3.csv")
-    ns3_results = pd.DataFrame(ns3_df.groupby(["MCS"]).mean())
+def show_mcs(data: ReportData, notes=""):
+    results = data.results
+    dcf_results_mean = data.results_mean.groupby("MCS", as_index=False).mean(
+        numeric_only=True
+    )
     alpha = 0.05
-    std = results.groupby("MCS").std().loc[:, "THR"]
+    std = results.groupby("MCS").std(numeric_only=True).loc[:, "THR"]
     n = results.groupby("MCS").count().loc[:, "THR"]
-    yerr = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
-    print(dcf_results_mean.head())
-
-    dcf_results_mean["THR_NS3"] = ns3_results["THR"].tolist()
-
-    std = ns3_df.groupby("MCS").std().loc[:, "THR"]
-    n = ns3_df.groupby("MCS").count().loc[:, "THR"]
-    yerr2 = std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)
+    yerr = [(std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)).to_numpy()]
+    columns = ["THR"]
+    legend = ["DCF-SimPy"]
+    if os.path.exists(results_mcs_ns3):
+        ns3_df = pd.read_csv(results_mcs_ns3)
+        ns3_results = pd.DataFrame(ns3_df.groupby(["MCS"]).mean())
+        dcf_results_mean["THR_NS3"] = ns3_results["THR"].tolist()
+        std = ns3_df.groupby("MCS").std().loc[:, "THR"]
+        n = ns3_df.groupby("MCS").count().loc[:, "THR"]
+        yerr.append((std / np.sqrt(n) * st.t.ppf(1 - alpha / 2, n - 1)).to_numpy())
+        columns.append("THR_NS3")
+        legend.append("ns-3.31")
     dcf_results_mean.plot(
         x="MCS",
-        y=["THR", "THR_NS3"],
+        y=columns,
         kind="bar",
-        yerr=[yerr, yerr2],
+        yerr=np.array(yerr),
         align="center",
         alpha=1,
         ecolor="black",
@@ -256,73 +329,122 @@ def show_mcs(csv_name, csv_mean, notes=""):
     )
     plt.xlabel("MCS")
     plt.ylabel("Throughput [Mb/s]")
-    plt.legend(["DCF-SimPy", "ns-3.31"])
-    plt.savefig("pdf/MCS_CHANGE.pdf")
-    plt.show()
+    plt.legend(legend)
+    plt.savefig(f"{data.path}pdf/MCS_CHANGE.pdf")
 
 
-def plot_by_multiple_cw(csv_name):
-    new_results = pd.read_csv(csv_name, delimiter=",").loc[
-        :, ["N_OF_STATIONS", "THR", "CW_MIN"]
-    ]
-    cw = new_results.loc[new_results["N_OF_STATIONS"] == 5]["CW_MIN"].to_list()
-    print(cw)
+def plot_by_multiple_cw(data: ReportData):
+    new_results = data.results_mean.loc[:, ["N_OF_STATIONS", "THR", "CW_MIN"]]
     plt.figure()
-    plt.plot(cw, new_results.loc[new_results["N_OF_STATIONS"] == 5]["THR"] / 54, "-bo")
-    plt.plot(cw, new_results.loc[new_results["N_OF_STATIONS"] == 10]["THR"] / 54, "-sb")
-    plt.plot(
-        cw,
-        new_results.loc[new_results["N_OF_STATIONS"] == 20]["THR"] / 54,
-        "-bo",
-        fillstyle="none",
-    )
-    plt.plot(
-        cw,
-        new_results.loc[new_results["N_OF_STATIONS"] == 50]["THR"] / 54,
-        "-bs",
-        fillstyle="none",
-    )
+    legend = []
+    cw = []
+    for n, style in [(5, "-bo"), (10, "-sb"), (20, "-bo"), (50, "-bs")]:
+        points = new_results.loc[new_results["N_OF_STATIONS"] == n]
+        if points.empty:
+            continue
+        cw = points["CW_MIN"].to_list()
+        plt.plot(
+            cw,
+            points["THR"] / 54,
+            style,
+            fillstyle="full" if n <= 10 else "none",
+        )
+        legend.append(f"n={n}")
     plt.xscale("log")
-    plt.xticks(cw, [str(n + 1) for n in cw])
-    plt.legend(["n=5", "n=10", "n=20", "n=50"])
+    plt.xticks(cw, [str(int(n) + 1) for n in cw])
+    plt.legend(legend)
     plt.xlabel("Cw_min size")
     plt.ylabel("Normalized throughput")
     plt.title("Saturation throughput vs cw_min")
-    plt.savefig("pdf/CW_Comparison.pdf")
-    plt.show()
-
-
-def show_results_changing_stations(path):
-    file = f"{path}results.csv"
-    file_mean = f"{path}results-mean.csv"
-    calculate_mean_and_std(file, file_mean)
-    os.mkdir(f"{path}pdf")
-    calculate_p_coll_mse(path)
-    calculate_thr_mse_stderr(path)
-    calculate_thr_mse(path)
-    plot_thr(Times().get_thr(), path)
-    show_backoffs(path)
-
-
-def show_results_changing_payload(path):
-    file = f"{path}results.csv"
-    file_mean = f"{path}results-mean.csv"
-    calculate_mean_and_std(file, file_mean)
-    os.mkdir(f"{path}pdf")
-    show_payload(file, file_mean)
-
-
-def show_results_changing_mcs(path):
-    file = f"{path}results.csv"
-    file_mean = f"{path}results-mean.csv"
-    calculate_mean_and_std(file, file_mean)
-    os.mkdir(f"{path}pdf")
-    show_mcs(file, file_mean)
-
-
-def show_results_changing_cw(path):
-    file = f"{path}results.csv"
-    file_mean = f"{path}results-mean.csv"
-    calculate_mean_and_std(file, file_mean)
-    os.mkdir(f"{path}pdf")
-    plot_by_multiple_cw(file_mean)
+    plt.savefig(f"{data.path}pdf/CW_Comparison.pdf")
+
+
+def _figures_changing_stations(data: ReportData, update_reference: bool) -> List:
+    p_coll = calculate_p_coll_mse(data)
+    thr = calculate_thr_mse(data)
+    if update_reference:
+        p_coll.to_csv(results_pcoll, index=False)
+        thr.to_csv(results_thr, index=False)
+    config = data.results.iloc[[0]].assign(N_OF_STATIONS=1)
+    figures = [
+        (plot_p_coll_mse, p_coll, data.path),
+        (calculate_thr_mse_stderr, data, thr),
+        (plot_thr_mse, thr, data.path),
+        (plot_thr, get_airtime().thr, data.path, analytical_model(config).thr[0]),
+    ]
+    if data.backoffs is not None:
+        figures.append((show_backoffs, data.backoffs, data.path))
+        figures.append((show_backoffs_merged, data.backoffs, data.path))
+    return figures
+
+
+REPORTS = {
+    "run_changing_stations": _figures_changing_stations,
+    "run_changing_payload": lambda data, update_reference: [(show_payload, data)],
+    "run_changing_mcs": lambda data, update_reference: [(show_mcs, data)],
+    "run_changing_cw": lambda data, update_reference: [(plot_by_multiple_cw, data)],
+}  # figures of results directories by the command that wrote them
+
+
+def report(
+    path: str,
+    workers: Optional[int] = None,
+    update_reference: bool = False,
+    kind: Optional[str] = None,
+) -> int:
+    """Figures of a results directory saved to its pdf directory.
+
+    Files of the directory are loaded once, results-mean.csv is calculated if it
+    is missing. Figures are rendered by the non-interactive Agg backend in worker
+    processes, so nothing is shown and reports can be made on machines without a
+    display. The command that wrote the directory, the end of its name, selects
+    the figures unless kind names one of REPORTS, other directories get
+    results-mean.csv only. With
+    update_reference the DCF-SimPy row is also appended to the reference tables.
+    Returns the number of saved figures.
+    """
+    path = os.path.join(path, "")
+    data = ReportData.load(path)
+    name = os.path.basename(os.path.dirname(path))
+    if kind is None:
+        kind = next((kind for kind in REPORTS if name.endswith(kind)), None)
+    if kind is None:
+        return 0
+    figures = REPORTS[kind](data, update_reference)
+    os.makedirs(f"{path}pdf", exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(figures))
+    if workers <= 1:
+        plt.switch_backend("Agg")
+        list(map(_render, figures))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=plt.switch_backend, initargs=("Agg",)
+        ) as executor:
+            list(executor.map(_render, figures))
+    return len(figures)
+
+
+def show_results_changing_stations(path: str) -> int:
+    return report(path, update_reference=True, kind="run_changing_stations")
+
+
+def show_results_changing_payload(path: str) -> int:
+    return report(path, kind="run_changing_payload")
+
+
+def show_results_changing_mcs(path: str) -> int:
+    return report(path, kind="run_changing_mcs")
+
+
+def show_results_changing_cw(path: str) -> int:
+    return report(path, kind="run_changing_cw")
+
+
+def _render(figure) -> None:
+    # one figure of a report, all figures of the process are closed afterwards,
+    # so figures rendered by the same worker do not draw into each other
+    function, *arguments = figure
+    try:
+        function(*arguments)
+    finally:
+        plt.close("all")
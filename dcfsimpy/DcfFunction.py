@@ -1,16 +1,32 @@
-import logging
+import csv
+import heapq
+import io
+import math
 import os
 import random
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from itertools import count
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
 import simpy
 
+from . import Trace
+from .Delays import ChannelDelays
+from .Metrics import METRICS_COLUMNS, METRICS_KEYS, ChannelMetrics
+from .TimeSeries import (
+    TIME_SERIES_COLUMN,
+    ChannelTimeSeries,
+    append_time_series,
+    rename_time_series,
+)
+from .Traffic import ChannelTraffic, channel_traffic
 from .Times import *
 
+if TYPE_CHECKING:  # the core imports only SimPy, NumPy is loaded by the first run
+    from .Backoffs import BackoffHistogram
+
 colors = [
     "\033[30m",
     "\033[32m",
@@ -23,6 +39,10 @@ colors = [
 ]  # colors to distinguish stations in output
 
 
+def color(index: int) -> str:
+    return colors[index % len(colors)]
+
+
 @dataclass()
 class Config:
     data_size: int = 1472  # size od payload in b
@@ -30,30 +50,67 @@ class Config:
     cw_max: int = 1023  # max cw window size
     r_limit: int = 7
     mcs: int = 7
+    traffic: str = "saturated"  # arrival process of every station, from TRAFFIC
+    load: float = 0.0  # offered load of every station in Mb/s, on-off during on
+    queue_size: int = 100  # frames queued by a station, unsaturated traffic only
+    on_time: float = 0.01  # mean duration of on periods of on-off traffic in s
+    off_time: float = 0.01  # mean duration of off periods of on-off traffic in s
 
 
-big_num = 10000000  # some big number for transmitting query preemption
+RETURN_PRIORITY = 2  # ends of ack timeouts, after other events of the same time
+ARRIVAL_PRIORITY = 3  # arrivals to empty queues, after ends of ack timeouts
 
 
-def log(station, mes: str) -> None:
-    logging.info(
-        f"{station.col}Time: {station.env.now} Station: {station.name} Message: {mes}"
-    )
+class LateTimeout(simpy.events.Event):
+    """Timeout processed after the usual events of the same time.
+
+    A station coming back from ack timeout or getting a frame in the same
+    microsecond in which a transmission starts or the channel gets idle finds the
+    channel in its new state, whatever the order in which the events were
+    scheduled, like in run_fast_simulation.
+    """
+
+    def __init__(self, env: simpy.Environment, delay: int, priority: int):
+        self.env = env
+        self.callbacks = []
+        self._value = None
+        self._ok = True
+        env.schedule(self, priority, delay)
 
 
 class Station:
+    __slots__ = (
+        "config",
+        "airtime",
+        "index",
+        "env",
+        "frame_to_send",
+        "succeeded_transmissions",
+        "failed_transmissions",
+        "failed_transmissions_in_row",
+        "cw_min",
+        "cw_max",
+        "channel",
+        "tracer",
+        "metrics",
+        "stream",
+        "delays",
+        "time_series",
+        "source",
+    )  # thousands of stations in dense channels
+
     def __init__(
         self,
         env: simpy.Environment,
-        name: str,
+        index: int,
         channel: dataclass,
         config: Config = Config(),
+        stream: Optional[random.Random] = None,
     ):
         self.config = config
-        self.times = Times(config.data_size, config.mcs)
-        self.name = name  # name of the station
+        self.airtime = get_airtime(config.data_size, config.mcs)  # shared airtimes
+        self.index = index  # number of the station, starting from 1
         self.env = env  # current environment
-        self.col = random.choice(colors)  # color of output
         self.frame_to_send = None  # the frame object which is next to send
         self.succeeded_transmissions = 0  # all succeeded transmissions for station
         self.failed_transmissions = 0  # all failed transmissions for station
@@ -63,109 +120,142 @@ class Station:
         self.cw_min = config.cw_min  # cw min parameter value
         self.cw_max = config.cw_max  # cw max parameter value
         self.channel = channel  # channel object
-        env.process(self.start())  # simulation process
-        self.process = None  # waiting back off process
+        self.tracer = channel.tracer  # events tracer, None when tracing is disabled
+        self.metrics = (
+            None if channel.metrics is None else channel.metrics.station()
+        )  # counters, None when disabled
+        self.stream = stream or random.Random()  # random numbers of this station only
+        self.delays = (
+            None if channel.delays is None else channel.delays.station()
+        )  # frame delays, None when disabled
+        self.time_series = channel.time_series  # windows of the channel or None
+        self.source = (
+            None if channel.traffic is None else channel.traffic.sources[index - 1]
+        )  # queue of frames, None for saturated traffic
+        env.process(
+            self.start() if self.source is None else self.serve()
+        )  # simulation process
+
+    @property
+    def name(self) -> str:
+        return f"Station {self.index}"
+
+    @property
+    def col(self) -> str:
+        return color(self.index)  # color of output
 
     def start(self):
         while True:
             self.frame_to_send = self.generate_new_frame()
             was_sent = False
             while not was_sent:
-                self.process = self.env.process(self.wait_back_off())
-                yield self.process
-                was_sent = yield self.env.process(self.send_frame())
+                yield from self.wait_back_off()
+                was_sent = yield from self.send_frame()
+
+    def serve(self):
+        # unsaturated station, with an empty queue it sleeps until the next arrival
+        source = self.source
+        while True:
+            source.update(self.env.now)
+            if not source.queued:
+                yield LateTimeout(
+                    self.env, source.next_arrival - self.env.now, ARRIVAL_PRIORITY
+                )
+                continue
+            self.frame_to_send = self.generate_new_frame()
+            while True:
+                yield from self.wait_back_off()
+                yield from self.send_frame()
+                if self.failed_transmissions_in_row == 0:  # sent or dropped
+                    break
+            source.queued -= 1
 
     def wait_back_off(self):
         back_off_time = self.generate_new_back_off_time(
             self.failed_transmissions_in_row
         )  # generate the new Back Off time
-        while back_off_time > -1:
-            try:
-                with self.channel.tx_lock.request() as req:  # wait for the lock/idle channel
-                    yield req
-                back_off_time += Times.t_difs  # add DIFS time
-                log(self, f"Starting to wait backoff: ({back_off_time})u...")
-                start = self.env.now  # store the current simulation time
-                self.channel.back_off_list.append(
-                    self
-                )  # join the list off stations which are waiting Back Offs
-                yield self.env.timeout(
-                    back_off_time
-                )  # join the environment action queue
-                log(self, f"Backoff waited, sending frame...")
-                back_off_time = -1  # leave the loop
-                self.channel.back_off_list.remove(
-                    self
-                )  # leave the waiting list as Back Off was waited successfully
-            except simpy.Interrupt:  # handle the interruptions from transmitting stations
-                log(self, "Waiting was interrupted, waiting to resume backoff...")
-                back_off_time -= (
-                    self.env.now - start
-                )  # set the Back Off to the remaining one
-                back_off_time -= 9  # simulate the delay of sensing the channel state
+        if self.metrics is not None:
+            self.metrics.tx_lock_requests += 1
+        with self.channel.tx_lock.request() as req:  # wait for the lock/idle channel
+            yield req
+        back_off_time += Times.t_difs  # add DIFS time
+        if self.tracer is not None:
+            self.tracer.record(self.env.now, self.name, Trace.BACKOFF, back_off_time)
+        yield self.channel.scheduler.wait(
+            self, back_off_time
+        )  # the scheduler freezes and resumes the Back Off with the channel state
+        if self.tracer is not None:
+            self.tracer.record(self.env.now, self.name, Trace.BACKOFF_END)
 
     def send_frame(self):
-        self.channel.tx_list.append(self)  # add station to currently transmitting list
-        res = self.channel.tx_queue.request(  # create request basing on this station frame length
-            priority=(big_num - self.frame_to_send.frame_time)
-        )
-        try:
-            result = yield res | self.env.timeout(
-                0
-            )  # try to hold transmitting lock(station with the longest frame will get this)
-            if (
-                res not in result
-            ):  # check if this station got lock, if not just wait you frame time
-                raise simpy.Interrupt("There is a longer frame...")
-            with self.channel.tx_lock.request() as lock:  # this station has the longest frame so hold the lock
-                yield lock
-                log(self, self.channel.back_off_list)
-                for (
-                    station
-                ) in (
-                    self.channel.back_off_list
-                ):  # stop all station which are waiting backoff as channel is not idle
-                    station.process.interrupt()
-                log(self, self.frame_to_send.frame_time)
-                yield self.env.timeout(
-                    self.frame_to_send.frame_time
-                )  # wait this station frame time
-                self.channel.back_off_list.clear()  # channel idle, clear backoff waiting list
-                was_sent = self.check_collision()  # check if collision occurred
-                if was_sent:  # transmission successful
-                    yield self.env.timeout(
-                        self.times.get_ack_frame_time()
-                    )  # wait ack
-                    self.channel.tx_list.clear()  # clear transmitting list
-                    self.channel.tx_queue.release(res)  # leave the transmitting queue
-                    return True
-            # there was collision
-            self.channel.tx_list.clear()  # clear transmitting list
-            self.channel.tx_queue.release(res)  # leave the transmitting queue
-            self.channel.tx_queue = simpy.PreemptiveResource(
-                self.env, capacity=1
-            )  # create new empty transmitting queue
-            yield self.env.timeout(
-                self.times.ack_timeout
-            )  # simulate ack timeout after failed transmission
-            return False
-        except simpy.Interrupt:  # this station does not have the longest frame, waiting frame time
+        if not self.channel.contention.join(
+            self
+        ):  # check if this station holds the channel, if not just wait you frame time
+            if self.metrics is not None:
+                self.metrics.other_transmissions += 1
+            if self.tracer is not None:
+                self.tracer.record(
+                    self.env.now, self.name, Trace.TX, self.frame_to_send.frame_time
+                )
             yield self.env.timeout(self.frame_to_send.frame_time)
-        was_sent = self.check_collision()
-        if was_sent:  # check if collision occurred
-            yield self.env.timeout(
-                self.times.get_ack_frame_time()
-            )  # wait ack
-        else:
-            log(self, "waiting wck timeout slave")
+            was_sent = self.check_collision()
+            if was_sent:  # check if collision occurred
+                yield self.env.timeout(self.airtime.ack_frame_time)  # wait ack
+            else:
+                if self.metrics is not None:
+                    self.metrics.other_collisions += 1
+                if self.tracer is not None:
+                    self.tracer.record(
+                        self.env.now, self.name, Trace.ACK_TIMEOUT, Times.ack_timeout
+                    )
+                yield LateTimeout(
+                    self.env, Times.ack_timeout, RETURN_PRIORITY
+                )  # simulate ack timeout after failed transmission
+            return was_sent
+        if self.metrics is not None:
+            self.metrics.holder_transmissions += 1
+            self.metrics.tx_lock_requests += 1
+        with self.channel.tx_lock.request() as lock:  # this station holds the channel so hold the lock
+            yield lock
+            if self.tracer is not None:
+                self.tracer.record(
+                    self.env.now,
+                    self.name,
+                    Trace.INTERRUPT,
+                    len(self.channel.scheduler),
+                )
+            self.channel.scheduler.freeze()  # stop all Back Offs as channel is not idle
+            if self.tracer is not None:
+                self.tracer.record(
+                    self.env.now, self.name, Trace.TX, self.frame_to_send.frame_time
+                )
             yield self.env.timeout(
-                Times.ack_timeout
-            )  # simulate ack timeout after failed transmission
-        return was_sent
+                self.frame_to_send.frame_time
+            )  # wait this station frame time
+            longer = (
+                self.channel.contention.longest_frame - self.frame_to_send.frame_time
+            )
+            if longer > 0:
+                yield self.env.timeout(longer)  # wait until the longest frame ends
+            was_sent = self.check_collision()  # check if collision occurred
+            if was_sent:  # transmission successful
+                yield self.env.timeout(self.airtime.ack_frame_time)  # wait ack
+                self.channel.contention.reset()  # clear transmitting stations
+                self.channel.scheduler.resume()  # channel idle, resume Back Offs
+                return True
+        # there was collision
+        if self.metrics is not None:
+            self.metrics.holder_collisions += 1
+        self.channel.scheduler.resume()  # channel idle, resume Back Offs
+        self.channel.contention.reset()  # clear transmitting stations
+        yield LateTimeout(
+            self.env, self.airtime.ack_timeout, RETURN_PRIORITY
+        )  # simulate ack timeout after failed transmission
+        return False
 
     def check_collision(self):  # check if the collision occurred
         if (
-            len(self.channel.tx_list) > 1
+            len(self.channel.contention) > 1
         ):  # check if there was more then one station transmitting
             self.sent_failed()
             return False
@@ -180,78 +270,231 @@ class Station:
         upper_limit = (
             upper_limit if upper_limit <= self.cw_max else self.cw_max
         )  # set upper limit to CW Max if is bigger then this parameter
-        back_off = random.randint(0, upper_limit)  # draw the back off value
-        self.channel.backoffs[back_off][
-            self.channel.n_of_stations
-        ] += 1  # store drawn value for future analyzes
-        return back_off * self.times.t_slot
+        back_off = int(
+            self.stream.random() * (upper_limit + 1)
+        )  # draw the back off value, the same uniform number scaled for every cw
+        if self.metrics is not None:
+            self.metrics.back_offs += 1
+        self.channel.backoffs[back_off] += 1  # store drawn value for future analyzes
+        return back_off * Times.t_slot
 
     def generate_new_frame(self):
-        frame_length = self.times.get_ppdu_frame_time()
-        return Frame(
-            frame_length, self.name, self.col, self.config.data_size, self.env.now
-        )
+        if self.frame_to_send is not None:  # the previous frame is done, reuse it
+            self.frame_to_send.reset(self.env.now)
+            return self.frame_to_send
+        frame_length = self.airtime.ppdu_frame_time
+        return Frame(frame_length, self.index, self.config.data_size, self.env.now)
 
     def sent_failed(self):
-        log(self, "There was a collision")
         self.frame_to_send.number_of_retransmissions += 1
         self.channel.failed_transmissions += 1
         self.failed_transmissions += 1
         self.failed_transmissions_in_row += 1
-        log(self, self.channel.failed_transmissions)
+        if self.time_series is not None:
+            self.time_series.failed(self.env.now, self.index)
+        if self.tracer is not None:
+            self.tracer.record(
+                self.env.now,
+                self.name,
+                Trace.COLLISION,
+                self.frame_to_send.number_of_retransmissions,
+            )
         if self.frame_to_send.number_of_retransmissions > self.config.r_limit:
+            if self.metrics is not None:
+                self.metrics.dropped_frames += 1
+            if self.delays is not None:
+                self.delays.retries[-1] += 1
             self.frame_to_send = self.generate_new_frame()
             self.failed_transmissions_in_row = 0
 
     def sent_completed(self):
-        log(
-            self,
-            f"Successfully sent frame, waiting ack: {self.times.get_ack_frame_time()}",
-        )
+        if self.tracer is not None:
+            self.tracer.record(
+                self.env.now, self.name, Trace.SUCCESS, self.airtime.ack_frame_time
+            )
         self.frame_to_send.t_end = self.env.now
         self.frame_to_send.t_to_send = (
             self.frame_to_send.t_end - self.frame_to_send.t_start
         )
+        if self.delays is not None:
+            self.delays.delays.add(self.frame_to_send.t_to_send)
+            self.delays.retries[self.frame_to_send.number_of_retransmissions] += 1
         self.channel.succeeded_transmissions += 1
         self.succeeded_transmissions += 1
         self.failed_transmissions_in_row = 0
         self.channel.bytes_sent += self.frame_to_send.data_size
+        if self.time_series is not None:
+            self.time_series.succeeded(
+                self.env.now, self.index, self.frame_to_send.data_size
+            )
         return True
 
 
+class BackOffScheduler:
+    """Remaining Back Offs of all stations waiting for an idle channel.
+
+    Deadlines are kept in one heap relative to ``offset`` and only the earliest
+    one has a pending timeout. A transmission freezes all Back Offs at once and
+    the idle channel resumes them by moving ``offset``, as every frozen Back Off
+    is shifted by the same time. Stations waiting in the same time are woken up
+    in the order they started, like their own timeouts would be.
+    """
+
+    def __init__(
+        self,
+        env: simpy.Environment,
+        tracer: Optional[Trace.Tracer] = None,
+        metrics: Optional[ChannelMetrics] = None,
+    ):
+        self.env = env
+        self.tracer = tracer
+        self.metrics = metrics
+        self.heap = []  # (deadline - offset, order, station, event)
+        self.offset = 0  # shift of all deadlines in the heap
+        self.order = count()  # order of starting Back Offs, breaks ties
+        self.frozen_at = None  # time when the channel got busy, None when idle
+        self.wake_up = None  # pending timeout of the earliest deadline
+        self.wake_up_time = None  # time of the pending timeout
+
+    def __len__(self):
+        return len(self.heap)
+
+    def wait(self, station: "Station", back_off_time: int) -> simpy.Event:
+        event = self.env.event()
+        heapq.heappush(
+            self.heap,
+            (
+                self.env.now + back_off_time - self.offset,
+                next(self.order),
+                station,
+                event,
+            ),
+        )
+        self.schedule_wake_up()
+        return event
+
+    def freeze(self):
+        self.frozen_at = self.env.now
+        self.wake_up = None  # the pending timeout is ignored
+        if self.metrics is not None:
+            self.metrics.busy_periods += 1
+            self.metrics.frozen_back_offs += len(self.heap)
+        if self.tracer is not None:
+            for deadline, _, station, _ in sorted(self.heap, key=lambda item: item[1]):
+                self.tracer.record(
+                    self.env.now,
+                    station.name,
+                    Trace.BACKOFF_FROZEN,
+                    deadline + self.offset - self.env.now - 9,
+                )
+
+    def resume(self):
+        # frozen Back Offs lose the delay of sensing the channel state and wait DIFS
+        self.offset += self.env.now + Times.t_difs - Times.t_slot - self.frozen_at
+        self.frozen_at = None
+        if self.tracer is not None:
+            for deadline, _, station, _ in sorted(self.heap, key=lambda item: item[1]):
+                self.tracer.record(
+                    self.env.now,
+                    station.name,
+                    Trace.BACKOFF,
+                    deadline + self.offset - self.env.now,
+                )
+        self.schedule_wake_up()
+
+    def schedule_wake_up(self):
+        if self.frozen_at is not None or not self.heap:
+            return
+        deadline = self.heap[0][0] + self.offset
+        if self.wake_up is not None and self.wake_up_time <= deadline:
+            return
+        self.wake_up = self.env.timeout(deadline - self.env.now)
+        self.wake_up.callbacks.append(self.expire)
+        self.wake_up_time = deadline
+
+    def expire(self, event: simpy.Event):
+        if event is not self.wake_up:  # cancelled by freeze or an earlier deadline
+            if self.metrics is not None:
+                self.metrics.cancelled_wake_ups += 1
+            return
+        self.wake_up = None
+        if self.metrics is not None:
+            self.metrics.wake_ups += 1
+        while self.heap and self.heap[0][0] + self.offset == self.env.now:
+            heapq.heappop(self.heap)[3].succeed()
+        self.schedule_wake_up()
+
+
+class ContentionResolver:
+    """Stations which started transmitting in the same slot.
+
+    The first one holds the channel lock and keeps it until the longest of
+    their frames ends, the others only wait their own frame time. The holder
+    resets the resolver when the channel gets idle, so one object serves all
+    transmissions of the channel.
+    """
+
+    def __init__(self):
+        self.transmitting = []  # transmitting stations in the channel
+        self.longest_frame = 0  # frame time of the longest transmitted frame
+
+    def __len__(self):
+        return len(self.transmitting)
+
+    def join(self, station: "Station") -> bool:
+        # returns whether the station holds the channel
+        self.transmitting.append(station)
+        self.longest_frame = max(self.longest_frame, station.frame_to_send.frame_time)
+        return len(self.transmitting) == 1
+
+    def reset(self):
+        self.transmitting.clear()
+        self.longest_frame = 0
+
+
 @dataclass()
 class Channel:
-    tx_queue: simpy.PreemptiveResource  # lock for the stations with the longest frame to transmit
     tx_lock: simpy.Resource  # channel lock (locked when there is ongoing transmission)
     n_of_stations: int  # number of transmitting stations in the channel
-    backoffs: Dict[int, Dict[int, int]]
-    tx_list: List[Station] = field(
-        default_factory=list
-    )  # transmitting stations in the channel
-    back_off_list: List[Station] = field(
-        default_factory=list
-    )  # stations in backoff phase
+    backoffs: List[int]  # draws of every back off value in this run
+    scheduler: BackOffScheduler  # stations in backoff phase
+    contention: ContentionResolver = field(
+        default_factory=ContentionResolver
+    )  # stations transmitting in the channel
     failed_transmissions: int = 0  # total failed transmissions
     succeeded_transmissions: int = 0  # total succeeded transmissions
     bytes_sent: int = 0  # total bytes sent
+    tracer: Optional[Trace.Tracer] = None  # events tracer, None when disabled
+    metrics: Optional[ChannelMetrics] = None  # counters, None when disabled
+    delays: Optional[ChannelDelays] = None  # frame delays, None when disabled
+    time_series: Optional[ChannelTimeSeries] = None  # windows, None when disabled
+    traffic: Optional[ChannelTraffic] = None  # queues, None for saturated traffic
 
 
-@dataclass()
+@dataclass(slots=True)
 class Frame:
     frame_time: int  # time of the frame
-    station_name: str  # name of the owning it station
-    col: str  # output color
+    station: int  # number of the owning it station
     data_size: int  # payload size
     t_start: int  # generation time
     number_of_retransmissions: int = 0  # retransmissions count
     t_end: int = None  # sent time
     t_to_send: int = None  # how much time it took to sent successfully
 
+    def reset(self, t_start: int):
+        # every station has one frame at a time, so it is reused for the next one
+        self.t_start = t_start
+        self.number_of_retransmissions = 0
+        self.t_end = None
+        self.t_to_send = None
+
     def __repr__(self):
-        return (
-            self.col
-            + "Frame: start=%d, end=%d, frame_time=%d, retransmissions=%d"
-            % (self.t_start, self.t_end, self.t_to_send, self.number_of_retransmissions)
+        col = color(self.station)  # output color
+        return col + "Frame: start=%d, end=%d, frame_time=%d, retransmissions=%d" % (
+            self.t_start,
+            self.t_end,
+            self.t_to_send,
+            self.number_of_retransmissions,
         )
 
 
@@ -261,20 +504,93 @@ def run_simulation(
     simulation_time: int,
     skip_results: bool,
     config: Config,
-    backoffs: Dict[int, Dict[int, int]],
+    backoffs: "BackoffHistogram",
     results: Dict[str, List[str]],
+    tracer: Optional[Trace.Tracer] = None,
+    metrics: Optional[ChannelMetrics] = None,
+    time_series: Optional[float] = None,
+    delays: bool = False,
 ):
-    random.seed(seed)
+    environment, channel = create_simulation(
+        number_of_stations,
+        seed,
+        config,
+        backoffs,
+        tracer,
+        metrics,
+        (
+            None
+            if time_series is None
+            else ChannelTimeSeries.create(
+                time_series, simulation_time, number_of_stations
+            )
+        ),
+        ChannelDelays(config.r_limit) if delays else None,
+    )
+    environment.run(until=simulation_time * 1000000)
+    backoffs.add(number_of_stations, channel.backoffs)
+    report_simulation(
+        channel,
+        number_of_stations,
+        seed,
+        simulation_time,
+        skip_results,
+        config,
+        results,
+    )
+    if metrics is not None and not skip_results:
+        metrics.add_to_results(results)
+
+
+def create_simulation(
+    number_of_stations: int,
+    seed: int,
+    config: Config,
+    backoffs: "BackoffHistogram",
+    tracer: Optional[Trace.Tracer] = None,
+    metrics: Optional[ChannelMetrics] = None,
+    time_series: Optional[ChannelTimeSeries] = None,
+    delays: Optional[ChannelDelays] = None,
+) -> Tuple[simpy.Environment, Channel]:
+    # environment with all stations started, advanced by the caller with run
+    streams = station_streams(seed, number_of_stations)
     environment = simpy.Environment()
     channel = Channel(
-        simpy.PreemptiveResource(environment, capacity=1),
         simpy.Resource(environment, capacity=1),
         number_of_stations,
-        backoffs,
+        backoffs.run_counter(),
+        BackOffScheduler(environment, tracer, metrics),
+        tracer=tracer,
+        metrics=metrics,
+        delays=delays,
+        time_series=time_series,
+        traffic=channel_traffic(config, seed, number_of_stations),
     )
     for i in range(1, number_of_stations + 1):
-        Station(environment, "Station {}".format(i), channel, config)
-    environment.run(until=simulation_time * 1000000)
+        Station(environment, i, channel, config, streams[i - 1])
+    return environment, channel
+
+
+def station_streams(seed: int, number_of_stations: int) -> List[random.Random]:
+    # independent random numbers of every station spawned from the seed of the run,
+    # a station gets the same numbers in every run with this seed whatever its cw
+    from numpy.random import SeedSequence
+
+    return [
+        random.Random(int(child.generate_state(1, "uint64")[0]))
+        for child in SeedSequence(seed).spawn(number_of_stations)
+    ]
+
+
+def report_simulation(
+    channel,
+    number_of_stations: int,
+    seed: int,
+    simulation_time: int,
+    skip_results: bool,
+    config: Config,
+    results: Dict[str, List[str]],
+):
     p_coll = "{:.4f}".format(
         channel.failed_transmissions
         / (channel.failed_transmissions + channel.succeeded_transmissions)
@@ -307,15 +623,125 @@ def add_to_results(p_coll, channel, n, results, seed, simulation_time, config: C
     )
     results.setdefault("PAYLOAD", []).append(config.data_size)
     results.setdefault("MCS", []).append(config.mcs)
+    results.setdefault("TRAFFIC", []).append(config.traffic)
+    results.setdefault("LOAD", []).append(config.load)
+    results.setdefault("R_LIMIT", []).append(config.r_limit)
+    results.setdefault("QUEUE_SIZE", []).append(config.queue_size)
+    results.setdefault("ON_TIME", []).append(config.on_time)
+    results.setdefault("OFF_TIME", []).append(config.off_time)
+    if channel.traffic is not None:
+        channel.traffic.add_to_results(results, simulation_time * 1000000)
+    else:  # saturated stations always have a frame
+        results.setdefault("ARRIVED_FRAMES", []).append(math.nan)
+        results.setdefault("LOST_FRAMES", []).append(math.nan)
+    if channel.delays is not None:
+        channel.delays.add_to_results(results)
+    if channel.time_series is not None:
+        channel.time_series.add_to_results(results)
 
 
-def save_results(
-    results: Dict[str, str], backoffs: Dict[int, Dict[int, int]], function_name
-):
-    path = f"{os.getcwd()}/results/{datetime.fromtimestamp(time.time()).strftime('%Y-%m-%d-%H-%M-%s')}-{function_name}/"
-    os.mkdir(path)
-    pd.DataFrame(results).to_csv(f"{path}results.csv", index=False)
-    pd.DataFrame(dict(sorted(backoffs.items()))).to_csv(
-        f"{path}backoffs.csv", index=False,
-    )
-    return path
+JOB_COLUMN = "JOB"  # index of the job of rows written while jobs finish out of order
+
+
+class ResultsWriter:
+    """Results directory written while the simulations are running.
+
+    Rows of every finished run are appended to results.csv with a single write
+    and flushed to disk, backoffs.csv is replaced atomically after every write.
+    A crashed sweep keeps everything finished so far and only one row of every
+    run is held in memory. Metrics columns, if present, go to metrics.csv, time
+    series of runs to time-series.npz as run-<row of results.csv>. Rows written
+    with the index of their job are appended as they finish with a JOB column
+    and sorted by it when the writer is closed.
+    """
+
+    def __init__(self, backoffs: "BackoffHistogram", function_name: str):
+        self.backoffs = backoffs
+        self.path = f"{os.getcwd()}/results/{datetime.fromtimestamp(time.time()).strftime('%Y-%m-%d-%H-%M-%s')}-{function_name}/"
+        os.mkdir(self.path)
+        self.columns = None  # order of columns, taken from the first results
+        self.file = open(f"{self.path}results.csv", "a", newline="")
+        self.metrics_file = None  # opened with the first metrics
+        self.rows = 0  # runs written to results.csv
+        self.with_jobs = False  # rows have a JOB column, set by the first write
+
+    def write(self, results: Dict[str, List], job: Optional[int] = None) -> None:
+        if not results:
+            return
+        rows = []
+        if self.columns is None:
+            self.columns = [
+                column
+                for column in results
+                if column not in METRICS_COLUMNS and column != TIME_SERIES_COLUMN
+            ]
+            rows.append(self.columns)
+            if job is not None:
+                self.with_jobs = True
+                rows[0] = [JOB_COLUMN] + rows[0]
+        tag = [job] if self.with_jobs else []
+        rows.extend(
+            tag + list(row)
+            for row in zip(*(results[column] for column in self.columns))
+        )
+        self.append(self.file, rows)
+        if METRICS_COLUMNS[0] in results:
+            columns = METRICS_KEYS + METRICS_COLUMNS
+            rows = []
+            if self.metrics_file is None:
+                self.metrics_file = open(f"{self.path}metrics.csv", "a", newline="")
+                rows.append(([JOB_COLUMN] if self.with_jobs else []) + columns)
+            rows.extend(
+                tag + list(row) for row in zip(*(results[column] for column in columns))
+            )
+            self.append(self.metrics_file, rows)
+        if TIME_SERIES_COLUMN in results:
+            append_time_series(
+                f"{self.path}time-series.npz", self.rows, results[TIME_SERIES_COLUMN]
+            )
+        self.rows += len(results[self.columns[0]])
+        self.save_backoffs()
+
+    @staticmethod
+    def append(file, rows) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        file.write(buffer.getvalue())
+        file.flush()
+        os.fsync(file.fileno())
+
+    def save_backoffs(self) -> None:
+        self.backoffs.to_csv(f"{self.path}backoffs.csv.tmp")
+        os.replace(f"{self.path}backoffs.csv.tmp", f"{self.path}backoffs.csv")
+
+    def sort_by_job(self) -> None:
+        # rows of jobs finished out of order are put in the order of jobs, stable
+        # for rows of the same job, and the JOB column is dropped
+        for name in ["metrics.csv", "results.csv"]:
+            file = f"{self.path}{name}"
+            if not os.path.exists(file):
+                continue
+            with open(file, newline="") as f:
+                header, *rows = list(csv.reader(f))
+            order = sorted(range(len(rows)), key=lambda row: int(rows[row][0]))
+            with open(f"{file}.tmp", "w", newline="") as f:
+                self.append(f, [header[1:]] + [rows[row][1:] for row in order])
+            os.replace(f"{file}.tmp", file)
+        if os.path.exists(f"{self.path}time-series.npz"):
+            rename_time_series(f"{self.path}time-series.npz", order)
+        self.with_jobs = False
+
+    def close(self) -> str:
+        self.save_backoffs()
+        self.file.close()
+        if self.metrics_file is not None:
+            self.metrics_file.close()
+        if self.with_jobs:
+            self.sort_by_job()
+        return self.path
+
+
+def save_results(results: Dict[str, str], backoffs: "BackoffHistogram", function_name):
+    writer = ResultsWriter(backoffs, function_name)
+    writer.write(results)
+    return writer.close()
@@ -0,0 +1,143 @@
+import math
+from math import log
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+DELAY_ACCURACY = 0.01  # relative error of delay quantiles
+DELAY_QUANTILES = [0.5, 0.95, 0.99]  # quantiles saved as DELAY_P50, ... columns
+DELAY_GAMMA = (1 + DELAY_ACCURACY) / (1 - DELAY_ACCURACY)  # ratio of bucket bounds
+DELAY_MULTIPLIER = 1 / math.log(DELAY_GAMMA)  # bucket of x is int(log(x) * this) + 1
+
+
+class DelaySketch:
+    """Quantiles of a stream of positive values in constant memory.
+
+    A value x is counted in bucket floor(log(x) / log(gamma)) + 1 with
+    gamma = (1 + DELAY_ACCURACY) / (1 - DELAY_ACCURACY), so every quantile is
+    known within DELAY_ACCURACY of its value, whatever the number of values.
+    Frame delays from 10 us to 100 s need at most about 800 buckets. Unlike P²
+    estimates, sketches of stations and replications are merged exactly by adding
+    their bucket counts.
+    """
+
+    __slots__ = ("offset", "counts", "total")
+
+    def __init__(self, offset: int = 0, counts: List[int] = None, total: float = 0):
+        self.offset = offset  # bucket of counts[0]
+        self.counts = counts or []  # number of values in every bucket
+        self.total = total  # sum of all values, for the exact mean
+
+    def add(self, value: float) -> None:
+        bucket = (
+            int(log(value) * DELAY_MULTIPLIER) + 1
+        )  # floor of positive values by int()
+        counts = self.counts
+        position = bucket - self.offset
+        if 0 <= position < len(counts):
+            counts[position] += 1
+        else:
+            self._extend(bucket)
+            self.counts[bucket - self.offset] += 1
+        self.total += value
+
+    def _extend(self, bucket: int) -> None:
+        # add empty buckets, so counts cover the bucket
+        if not self.counts:
+            self.offset = bucket
+            self.counts = [0]
+        elif bucket < self.offset:
+            self.counts[:0] = [0] * (self.offset - bucket)
+            self.offset = bucket
+        else:
+            self.counts.extend([0] * (bucket - self.offset - len(self.counts) + 1))
+
+    def merge(self, other: "DelaySketch") -> None:
+        if not other.counts:
+            return
+        self._extend(other.offset)
+        self._extend(other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        for position, count in enumerate(other.counts, start):
+            self.counts[position] += count
+        self.total += other.total
+
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def mean(self) -> float:
+        count = self.count()
+        return self.total / count if count else math.nan
+
+    def quantile(self, q: float) -> float:
+        # middle of the bucket holding the value of rank q * (count - 1)
+        rank = q * (self.count() - 1)
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return 2 * pow(DELAY_GAMMA, self.offset + position) / (DELAY_GAMMA + 1)
+        return math.nan
+
+    def to_text(self) -> str:
+        # "total:offset:count,count,..." saved in a single results column
+        return f"{self.total}:{self.offset}:{','.join(map(str, self.counts))}"
+
+    @classmethod
+    def from_text(cls, text: str) -> "DelaySketch":
+        total, offset, counts = text.split(":")
+        return cls(
+            int(offset), [int(count) for count in counts.split(",")], float(total)
+        )
+
+
+def merge_delay_sketches(texts: Iterable[str]) -> DelaySketch:
+    # one sketch of all frames of runs saved in DELAY_SKETCH columns
+    merged = DelaySketch()
+    for text in texts:
+        merged.merge(DelaySketch.from_text(text))
+    return merged
+
+
+@dataclass(slots=True)
+class StationDelays:
+    delays: DelaySketch  # access delays of sent frames [us]
+    retries: List[int]  # sent frames by retransmissions, dropped frames last
+
+
+@dataclass(slots=True)
+class ChannelDelays:
+    """Access delays and retransmissions of frames of every station.
+
+    Every station gets its own StationDelays, results contain their merged
+    quantiles, mean, retransmissions and the merged sketch as one row per run.
+    """
+
+    r_limit: int  # sent frames have 0 to r_limit retransmissions
+    stations: List[StationDelays] = field(default_factory=list)
+
+    def station(self) -> StationDelays:
+        delays = StationDelays(DelaySketch(), [0] * (self.r_limit + 2))
+        self.stations.append(delays)
+        return delays
+
+    def merged(self) -> StationDelays:
+        merged = StationDelays(DelaySketch(), [0] * (self.r_limit + 2))
+        for station in self.stations:
+            merged.delays.merge(station.delays)
+            merged.retries = [a + b for a, b in zip(merged.retries, station.retries)]
+        return merged
+
+    def add_to_results(self, results: Dict[str, List]) -> None:
+        merged = self.merged()
+        sent = merged.retries[:-1]
+        results.setdefault("DELAY_MEAN", []).append(merged.delays.mean())
+        for q in DELAY_QUANTILES:
+            results.setdefault(f"DELAY_P{q * 100:g}", []).append(
+                merged.delays.quantile(q)
+            )
+        results.setdefault("RETRIES_MEAN", []).append(
+            sum(retries * count for retries, count in enumerate(sent))
+            / max(sum(sent), 1)
+        )
+        results.setdefault("RETRIES", []).append(",".join(map(str, merged.retries)))
+        results.setdefault("DELAY_SKETCH", []).append(merged.delays.to_text())
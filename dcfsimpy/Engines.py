@@ -0,0 +1,4 @@
+# names of simulation engines, the engines are in Sweep, which loads NumPy, so the
+# names are kept here for choices of the CLI and other uses without running them
+ENGINE_NAMES = ["simpy", "fast"]  # keys of ENGINES, engines of single runs
+BATCH_ENGINE_NAMES = ["batch"]  # keys of BATCH_ENGINES, engines of all runs of a point
@@ -0,0 +1,222 @@
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from itertools import count
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from . import Trace
+from .Delays import ChannelDelays
+from .DcfFunction import Config, report_simulation, station_streams
+from .TimeSeries import ChannelTimeSeries
+from .Times import *
+from .Traffic import ChannelTraffic, channel_traffic
+
+if TYPE_CHECKING:
+    from .Backoffs import BackoffHistogram
+
+
+@dataclass()
+class FastChannel:
+    n_of_stations: int  # number of transmitting stations in the channel
+    backoffs: List[int]  # draws of every back off value in this run
+    failed_transmissions: int = 0  # total failed transmissions
+    succeeded_transmissions: int = 0  # total succeeded transmissions
+    bytes_sent: int = 0  # total bytes sent
+    delays: Optional[ChannelDelays] = None  # frame delays, None when not measured
+    time_series: Optional[ChannelTimeSeries] = None  # windows, None when disabled
+    traffic: Optional[ChannelTraffic] = None  # queues, None for saturated traffic
+
+
+def run_fast_simulation(
+    number_of_stations: int,
+    seed: int,
+    simulation_time: int,
+    skip_results: bool,
+    config: Config,
+    backoffs: "BackoffHistogram",
+    results: Dict[str, List[str]],
+    tracer: Optional[Trace.Tracer] = None,
+    time_series: Optional[float] = None,
+    delays: bool = False,
+):
+    """Event-skipping version of run_simulation for the same DCF model.
+
+    Remaining back offs are kept in one heap as deadlines relative to ``offset``.
+    Every busy period shifts all frozen deadlines by the same amount, so it is
+    enough to move ``offset`` instead of updating each waiting station. Stations
+    with empty queues sleep in another heap until their next arrival, so idle
+    periods are skipped at once. Every station draws its back offs from its own
+    stream like in run_simulation, so for the same seed both engines give
+    identical results. Only transmissions are traced.
+    """
+    streams = station_streams(seed, number_of_stations)
+    airtime = get_airtime(config.data_size, config.mcs)
+    frame_time = airtime.ppdu_frame_time
+    ack_time = airtime.ack_frame_time
+    until = simulation_time * 1000000
+    channel = FastChannel(
+        number_of_stations,
+        backoffs.run_counter(),
+        delays=ChannelDelays(config.r_limit) if delays else None,
+        time_series=(
+            None
+            if time_series is None
+            else ChannelTimeSeries.create(
+                time_series, simulation_time, number_of_stations
+            )
+        ),
+        traffic=channel_traffic(config, seed, number_of_stations),
+    )
+    series = channel.time_series
+    sources = None if channel.traffic is None else channel.traffic.sources
+    counts = channel.backoffs
+    failed_in_row = [0] * number_of_stations
+    retransmissions = [0] * number_of_stations
+    frame_start = [0] * number_of_stations  # generation time of the current frame
+    sketches = retries = None  # delays of sent frames and frames by retransmissions
+    if channel.delays is not None:
+        stations = [channel.delays.station() for _ in range(number_of_stations)]
+        sketches = [station.delays for station in stations]
+        retries = [station.retries for station in stations]
+    order = count()  # order of starting back off, breaks ties like SimPy event ids
+
+    def draw(station: int) -> int:
+        upper_limit = min(
+            pow(2, failed_in_row[station]) * (config.cw_min + 1) - 1, config.cw_max
+        )
+        back_off = int(streams[station].random() * (upper_limit + 1))
+        counts[back_off] += 1
+        return back_off * Times.t_slot
+
+    offset = 0  # shift of all frozen deadlines in the heap
+    returning = deque()  # (time, station) of stations waiting ack timeout
+    sleeping = []  # (next arrival, order, station) of stations with empty queues
+
+    def next_wake(before: int) -> Optional[Tuple[int, int, bool]]:
+        # the first station coming back from ack timeout or woken by an arrival
+        # before the time, arrivals are the last ones in the same time like in SimPy
+        if returning and returning[0][0] < before:
+            if not sleeping or returning[0][0] <= sleeping[0][0]:
+                t_return, station = returning.popleft()
+                return t_return, station, True
+        if sleeping and sleeping[0][0] < before:
+            t_arrival, _, station = heapq.heappop(sleeping)
+            return t_arrival, station, False
+        return None
+
+    def start_frame(now: int, station: int, returned: bool) -> Optional[int]:
+        # back off of a station starting to send, returned stations whose frame was
+        # sent or dropped take the next one from the queue, or sleep without it
+        if sources is not None and (not returned or failed_in_row[station] == 0):
+            source = sources[station]
+            if returned:
+                source.queued -= 1
+            source.update(now)
+            if not source.queued:
+                heapq.heappush(sleeping, (source.next_arrival, next(order), station))
+                return None
+            frame_start[station] = now
+        return draw(station)
+
+    heap = []
+    for station in range(number_of_stations):
+        back_off = start_frame(0, station, False)
+        if back_off is not None:
+            heap.append((Times.t_difs + back_off, next(order), station))
+    heapq.heapify(heap)
+
+    while heap or returning or sleeping:
+        # stations coming back from ack timeout or woken by an arrival to an idle
+        # channel start back off
+        while True:
+            wake = next_wake(min(heap[0][0] + offset, until) if heap else until)
+            if wake is None:
+                break
+            t_wake, station, returned = wake
+            back_off = start_frame(t_wake, station, returned)
+            if back_off is not None:
+                deadline = t_wake + Times.t_difs + back_off
+                heapq.heappush(heap, (deadline - offset, next(order), station))
+        if not heap or heap[0][0] + offset >= until:
+            break
+        t_start = heap[0][0] + offset
+        transmitting = []
+        while heap and heap[0][0] + offset == t_start:
+            transmitting.append(heapq.heappop(heap)[2])
+        t_end = t_start + frame_time
+        if len(transmitting) == 1:
+            t_idle = t_end + ack_time
+        else:
+            t_idle = t_end
+        # stations coming back or woken during the transmission draw and wait for
+        # idle channel
+        waiting = []
+        while True:
+            wake = next_wake(min(t_idle, until))
+            if wake is None:
+                break
+            back_off = start_frame(*wake)
+            if back_off is not None:
+                waiting.append((back_off, wake[1]))
+        if t_end >= until:
+            break
+        if tracer is not None:
+            for station in transmitting:
+                tracer.record(t_start, f"Station {station + 1}", Trace.TX, frame_time)
+        if len(transmitting) == 1:
+            station = transmitting[0]
+            channel.succeeded_transmissions += 1
+            channel.bytes_sent += config.data_size
+            if sketches is not None:
+                sketches[station].add(t_end - frame_start[station])
+                retries[station][retransmissions[station]] += 1
+            frame_start[station] = t_end + ack_time  # the next frame after ACK
+            if series is not None:
+                series.succeeded(t_end, station + 1, config.data_size)
+            failed_in_row[station] = 0
+            retransmissions[station] = 0
+            if tracer is not None:
+                tracer.record(t_end, f"Station {station + 1}", Trace.SUCCESS, ack_time)
+        else:
+            for station in transmitting:
+                channel.failed_transmissions += 1
+                failed_in_row[station] += 1
+                retransmissions[station] += 1
+                if series is not None:
+                    series.failed(t_end, station + 1)
+                if tracer is not None:
+                    tracer.record(
+                        t_end,
+                        f"Station {station + 1}",
+                        Trace.COLLISION,
+                        retransmissions[station],
+                    )
+                if retransmissions[station] > config.r_limit:
+                    if retries is not None:
+                        retries[station][-1] += 1
+                    frame_start[station] = t_end
+                    failed_in_row[station] = 0
+                    retransmissions[station] = 0
+            # the longest frame holder is the first one, it finishes ack timeout last
+            for station in transmitting[1:] + transmitting[:1]:
+                returning.append((t_end + airtime.ack_timeout, station))
+        # frozen back offs lose the slot in which the channel got busy
+        offset += t_idle + Times.t_difs - Times.t_slot - t_start
+        for back_off, station in waiting:
+            deadline = t_idle + Times.t_difs + back_off
+            heapq.heappush(heap, (deadline - offset, next(order), station))
+        if len(transmitting) == 1 and t_idle < until:
+            back_off = start_frame(t_idle, transmitting[0], True)
+            if back_off is not None:
+                deadline = t_idle + Times.t_difs + back_off
+                heapq.heappush(heap, (deadline - offset, next(order), transmitting[0]))
+    backoffs.add(number_of_stations, counts)
+    report_simulation(
+        channel,
+        number_of_stations,
+        seed,
+        simulation_time,
+        skip_results,
+        config,
+        results,
+    )
@@ -0,0 +1,215 @@
+import logging
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+QUEUE_DIRECTORIES = ["pending", "running", "done"]  # states of tasks in the queue
+
+
+class JobQueue:
+    """Jobs run by worker processes sharing a directory, on this host or others.
+
+    The coordinator writes every task to pending/. A worker claims a task by
+    renaming it to running/ under its own name, renames are atomic, so a task is
+    run by one worker at a time. While the task runs, the worker refreshes the
+    modification time of the claimed file as its lease and finally writes the
+    output to done/. Tasks whose lease was not refreshed for lease_timeout s, e.g.
+    of a killed worker or a lost host, are put back to pending/, at most
+    max_attempts times. Leases are measured with the clock of the coordinator, so
+    clocks of hosts do not need to agree. Tasks are pickles, so the directory must
+    be shared by trusted hosts only.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_timeout: float = 300.0,
+        max_attempts: int = 3,
+        poll_interval: float = 0.5,
+    ):
+        self.path = path
+        self.lease_timeout = lease_timeout  # time without refresh of a lost task [s]
+        self.max_attempts = max_attempts  # runs of a task before it fails
+        self.poll_interval = poll_interval  # time between checks of the directory [s]
+        self.leases: Dict[str, Tuple[float, float]] = {}  # file: (mtime, seen at)
+        for directory in QUEUE_DIRECTORIES:
+            os.makedirs(os.path.join(path, directory), exist_ok=True)
+
+    def map(self, function: Callable, *iterables) -> Iterator:
+        # like Executor.map, all calls are published at once and run by workers,
+        # outputs are yielded in order, exceptions of calls are raised here
+        return _in_order(self.map_unordered(function, *iterables))
+
+    def map_unordered(
+        self, function: Callable, *iterables
+    ) -> Iterator[Tuple[int, Any]]:
+        # like map, but (index of the call, output) pairs are yielded as calls finish
+        run = uuid.uuid4().hex[:12]  # tasks of this call, so many calls can share it
+        tasks = list(zip(*iterables))
+        for index, arguments in enumerate(tasks):
+            _write(
+                self._file("pending", f"{run}-{index:06d}-0.pkl"),
+                (function, arguments, self.lease_timeout),
+            )
+        return self._outputs(run, len(tasks))
+
+    def _outputs(self, run: str, tasks: int) -> Iterator[Tuple[int, Any]]:
+        # outputs of the run as they are posted, lost tasks are requeued meanwhile
+        try:
+            remaining = set(range(tasks))
+            while remaining:
+                self._requeue_lost(run)
+                posted = sorted(
+                    name
+                    for name in os.listdir(os.path.join(self.path, "done"))
+                    if name.startswith(run) and name.endswith(".pkl")
+                )
+                if not posted:
+                    time.sleep(self.poll_interval)
+                for name in posted:
+                    index = int(name[len(run) + 1 : -4])
+                    if index not in remaining:
+                        _remove(self._file("done", name))  # also run by a lost worker
+                        continue
+                    remaining.remove(index)
+                    yield index, self._load(name)
+        finally:
+            for directory in QUEUE_DIRECTORIES[::2]:
+                for name in os.listdir(os.path.join(self.path, directory)):
+                    if name.startswith(run):
+                        _remove(self._file(directory, name))
+
+    def _file(self, directory: str, name: str) -> str:
+        return os.path.join(self.path, directory, name)
+
+    def _load(self, name: str):
+        file = self._file("done", name)
+        with open(file, "rb") as f:
+            failed, output = pickle.load(f)
+        _remove(file)
+        if failed:
+            raise output
+        return output
+
+    def _requeue_lost(self, run: str) -> None:
+        now = time.monotonic()
+        running = [
+            name
+            for name in os.listdir(os.path.join(self.path, "running"))
+            if name.startswith(run)
+        ]
+        self.leases = {
+            name: self.leases[name] for name in running if name in self.leases
+        }
+        for name in running:
+            try:
+                mtime = os.stat(self._file("running", name)).st_mtime
+            except FileNotFoundError:
+                continue  # finished meanwhile
+            if name not in self.leases or self.leases[name][0] != mtime:
+                self.leases[name] = (mtime, now)
+                continue
+            if now - self.leases[name][1] < self.lease_timeout:
+                continue
+            task, attempt, worker = name.rsplit("-", 2)
+            logging.warning(f"Lease of task {task} run by {worker} expired")
+            if int(attempt) + 1 >= self.max_attempts:
+                raise RuntimeError(
+                    f"Task {task} was lost by {self.max_attempts} workers."
+                )
+            try:
+                os.rename(
+                    self._file("running", name),
+                    self._file("pending", f"{task}-{int(attempt) + 1}.pkl"),
+                )
+            except FileNotFoundError:
+                pass  # finished at the last moment
+
+
+def run_worker(
+    path: str,
+    idle_timeout: Optional[float] = None,
+    poll_interval: float = 0.5,
+) -> int:
+    """Run tasks of the queue in the directory until it is idle for idle_timeout s.
+
+    Without idle_timeout the worker runs until it is stopped. Returns the number
+    of run tasks.
+    """
+    queue = JobQueue(path, poll_interval=poll_interval)
+    worker = f"{socket.gethostname()}.{os.getpid()}".replace("-", "_")
+    done = 0
+    idle_since = time.monotonic()
+    while idle_timeout is None or time.monotonic() - idle_since < idle_timeout:
+        for name in sorted(os.listdir(os.path.join(path, "pending"))):
+            if not name.endswith(".pkl"):
+                continue  # still being written
+            claimed = queue._file("running", f"{name[:-4]}-{worker}")
+            try:
+                os.rename(queue._file("pending", name), claimed)
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            _run_task(queue, claimed, name.rsplit("-", 1)[0])
+            done += 1
+            idle_since = time.monotonic()
+            break
+        else:
+            time.sleep(poll_interval)
+    return done
+
+
+def _run_task(queue: JobQueue, claimed: str, task: str) -> None:
+    with open(claimed, "rb") as f:
+        function, arguments, lease_timeout = pickle.load(f)
+    logging.info(f"Running task {task}")
+    stop = threading.Event()
+    lease = threading.Thread(target=_refresh_lease, args=(claimed, lease_timeout, stop))
+    lease.start()
+    try:
+        output = (False, function(*arguments))
+    except Exception as error:
+        output = (True, error)
+    finally:
+        stop.set()
+        lease.join()
+    _write(queue._file("done", f"{task}.pkl"), output)
+    _remove(claimed)
+
+
+def _refresh_lease(file: str, lease_timeout: float, stop: threading.Event) -> None:
+    # several refreshes per lease, so one late refresh does not lose the task
+    while not stop.wait(lease_timeout / 4):
+        try:
+            os.utime(file)
+        except FileNotFoundError:
+            return  # requeued by the coordinator, the output is still posted
+
+
+def _in_order(outputs: Iterator[Tuple[int, Any]]) -> Iterator:
+    # outputs of (index, output) pairs in the order of indexes, each as soon as all
+    # before it are done
+    done = dict()
+    next_index = 0
+    for index, output in outputs:
+        done[index] = output
+        while next_index in done:
+            yield done.pop(next_index)
+            next_index += 1
+
+
+def _write(file: str, value) -> None:
+    # readers never see a partially written file
+    with open(f"{file}.{os.getpid()}.tmp", "wb") as f:
+        pickle.dump(value, f)
+    os.replace(f"{file}.{os.getpid()}.tmp", file)
+
+
+def _remove(file: str) -> None:
+    try:
+        os.remove(file)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field, fields
+from typing import Dict, List
+
+# results columns identifying the run, metrics.csv can be joined with results.csv
+METRICS_KEYS = [
+    "SEED",
+    "N_OF_STATIONS",
+    "CW_MIN",
+    "CW_MAX",
+    "PAYLOAD",
+    "MCS",
+    "TRAFFIC",
+    "LOAD",
+    "R_LIMIT",
+    "QUEUE_SIZE",
+    "ON_TIME",
+    "OFF_TIME",
+]
+METRICS_COLUMNS = [
+    "BACK_OFFS",
+    "TX_LOCK_REQUESTS",
+    "HOLDER_TRANSMISSIONS",
+    "OTHER_TRANSMISSIONS",
+    "HOLDER_COLLISIONS",
+    "OTHER_COLLISIONS",
+    "DROPPED_FRAMES",
+    "BUSY_PERIODS",
+    "FROZEN_BACK_OFFS",
+    "WAKE_UPS",
+    "CANCELLED_WAKE_UPS",
+]  # results columns saved to metrics.csv instead of results.csv
+
+
+@dataclass(slots=True)
+class StationMetrics:
+    back_offs: int = 0  # drawn back offs
+    tx_lock_requests: int = 0  # requests of the channel lock
+    holder_transmissions: int = 0  # transmissions holding the channel lock
+    other_transmissions: int = 0  # transmissions started in the slot of a holder
+    holder_collisions: int = 0  # collisions handled by the holder path
+    other_collisions: int = 0  # collisions handled by the other path
+    dropped_frames: int = 0  # frames dropped at r limit
+
+
+@dataclass(slots=True)
+class ChannelMetrics:
+    """Opt-in counters of the SimPy model, only integer increments on hot paths.
+
+    Every station gets its own StationMetrics, results contain their sums and
+    channel counters as one row per run.
+    """
+
+    busy_periods: int = 0  # freezes of all waiting back offs
+    frozen_back_offs: int = 0  # back offs frozen by transmissions
+    wake_ups: int = 0  # fired timeouts of the earliest back off deadline
+    cancelled_wake_ups: int = 0  # timeouts ignored after a freeze or earlier deadline
+    stations: List[StationMetrics] = field(default_factory=list)
+
+    def station(self) -> StationMetrics:
+        metrics = StationMetrics()
+        self.stations.append(metrics)
+        return metrics
+
+    def totals(self) -> Dict[str, int]:
+        totals = dict.fromkeys(METRICS_COLUMNS, 0)
+        for metrics in self.stations:
+            for counter in fields(StationMetrics):
+                totals[counter.name.upper()] += getattr(metrics, counter.name)
+        for counter in fields(self):
+            if counter.name != "stations":
+                totals[counter.name.upper()] = getattr(self, counter.name)
+        return totals
+
+    def add_to_results(self, results: Dict[str, List]) -> None:
+        for name, value in self.totals().items():
+            results.setdefault(name, []).append(value)
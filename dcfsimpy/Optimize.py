@@ -0,0 +1,200 @@
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import Dict, Generator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .Backoffs import BackoffHistogram
+from .Cache import ResultCache
+from .DcfFunction import ResultsWriter
+from .JobQueue import JobQueue
+from .Precision import half_width
+from .Sweep import Job, batch_jobs, job_runner, merge_outputs, point_key, replicate
+
+
+@dataclass(frozen=True)
+class CwOptimum:
+    cw_min: int
+    cw_max: int
+    thr: float  # mean THR of the optimum [Mb/s]
+    runs: int  # runs of the optimum
+    evaluations: int  # runs simulated for this point
+    grid_evaluations: int  # runs of the full grid with max runs of every cw
+
+
+def cw_candidates(cw_min: int, cw_max: int) -> List[int]:
+    # cw sizes 2^x - 1 from cw_min to cw_max, like run_changing_cw uses
+    return [
+        pow(2, x) - 1
+        for x in range(1, cw_max.bit_length() + 1)
+        if cw_min <= pow(2, x) - 1 <= cw_max
+    ]
+
+
+def _is_worse(
+    thr: List[float], best_thr: List[float], paired: bool, alpha: float
+) -> bool:
+    # with common random numbers run i of both cw has the same seed, so the
+    # confidence interval of paired differences is used, it is much narrower
+    # than the intervals of both means
+    if paired:
+        differences = np.subtract(best_thr, thr)
+        return np.mean(differences) - half_width(differences, alpha) > 0
+    return np.mean(thr) + half_width(thr, alpha) < np.mean(best_thr) - half_width(
+        best_thr, alpha
+    )
+
+
+def _successive_halving(
+    values: Dict[tuple, List[float]],
+    candidates: List[Job],
+    runs: int,
+    max_runs: int,
+    paired: bool,
+    alpha: float,
+) -> Generator[List[Tuple[Job, int]], None, Job]:
+    """Candidate with the highest mean THR, found by successive halving.
+
+    All candidates get runs replications. After every round, candidates with THR
+    significantly lower than the best candidate are dropped, and at most the
+    better half is kept for the next round with twice as many runs, up to
+    max_runs. Yields candidates with the numbers of runs they need, the caller
+    adds THR of the new runs to values.
+    """
+    survivors = candidates
+    target = runs
+    while True:
+        pending = [
+            (job, target) for job in survivors if len(values[point_key(job)]) < target
+        ]
+        if pending:
+            yield pending
+        thr = [values[point_key(job)][:target] for job in survivors]
+        order = np.argsort([np.mean(job_thr) for job_thr in thr])[::-1]
+        if len(survivors) == 1 or target >= max_runs:
+            return survivors[order[0]]
+        survivors = [
+            survivors[i]
+            for i in order
+            if not _is_worse(thr[i], thr[order[0]], paired, alpha)
+        ][: max(len(survivors) // 2, 1)]
+        target = min(target * 2, max_runs)
+
+
+def _search(
+    values: Dict[tuple, List[float]],
+    point: Job,
+    optimize_cw_max: bool,
+    runs: int,
+    max_runs: int,
+    paired: bool,
+    alpha: float,
+) -> Generator[List[Tuple[Job, int]], None, Tuple[Job, int]]:
+    # cw min with the cw max of the point, then cw max from the found cw min,
+    # returns the best job and the number of cw pairs of the full grid
+    config = point.config
+    cw_mins = cw_candidates(1, config.cw_max)
+    best = yield from _successive_halving(
+        values,
+        [replace(point, config=replace(config, cw_min=cw)) for cw in cw_mins],
+        runs,
+        max_runs,
+        paired,
+        alpha,
+    )
+    if not optimize_cw_max:
+        return best, len(cw_mins)
+    best = yield from _successive_halving(
+        values,
+        [
+            replace(best, config=replace(best.config, cw_max=cw))
+            for cw in cw_candidates(best.config.cw_min, config.cw_max)
+        ],
+        runs,
+        max_runs,
+        paired,
+        alpha,
+    )
+    return best, sum(len(cw_candidates(cw, config.cw_max)) for cw in cw_mins)
+
+
+def optimize_cw(
+    points: List[Job],
+    workers: Optional[int],
+    skip_results: bool,
+    backoffs: BackoffHistogram,
+    results: Union[Dict[str, List], ResultsWriter, None],
+    cache: Optional[ResultCache],
+    runs: int,
+    max_runs: int,
+    seed: int,
+    optimize_cw_max: bool = False,
+    common_random_numbers: bool = True,
+    alpha: float = 0.05,
+    queue: Optional[JobQueue] = None,
+) -> Dict[tuple, CwOptimum]:
+    """Throughput maximising cw min (and cw max) of every point.
+
+    Cw sizes 2^x - 1 are compared by successive halving instead of running the
+    full grid with max_runs replications: clearly worse cw sizes stop after a few
+    runs and only the close ones get more. With optimize_cw_max, cw max is
+    searched from the found cw min afterwards. With common random numbers all cw
+    are simulated with the same seeds and compared by paired differences, so
+    fewer runs tell them apart. Searches of all points advance together, so every
+    round of runs is simulated in parallel. Returns the optimum of every point by
+    its point_key with the number of runs spent on it.
+    """
+    values = defaultdict(list)  # THR of all runs of every evaluated point
+    evaluated = defaultdict(set)  # keys of points evaluated by every search
+    searches = {
+        point_key(point): _search(
+            values,
+            point,
+            optimize_cw_max,
+            runs,
+            max_runs,
+            common_random_numbers,
+            alpha,
+        )
+        for point in points
+    }
+    optima = {}
+    written = 0  # jobs of earlier rounds, rows of later rounds follow theirs
+    with job_runner(workers, queue=queue) as run:
+        while searches:
+            jobs = []
+            for key, search in list(searches.items()):
+                try:
+                    pending = search.send(None)
+                except StopIteration as stop:
+                    best, grid = stop.value
+                    optima[key] = CwOptimum(
+                        best.config.cw_min,
+                        best.config.cw_max,
+                        float(np.mean(values[point_key(best)])),
+                        len(values[point_key(best)]),
+                        sum(
+                            len(values[evaluated_key])
+                            for evaluated_key in evaluated[key]
+                        ),
+                        grid * max_runs,
+                    )
+                    del searches[key]
+                    continue
+                for job, target in pending:
+                    evaluated[key].add(point_key(job))
+                    done = len(values[point_key(job)])
+                    jobs.extend(
+                        replicate(
+                            [job], target - done, seed, done, common_random_numbers
+                        )
+                    )
+            jobs = batch_jobs(jobs)
+            for index, job_results in merge_outputs(
+                backoffs, results, run(jobs, False, cache), written, skip_results
+            ):
+                values[point_key(jobs[index])].extend(
+                    float(thr) for thr in job_results["THR"]
+                )
+            written += len(jobs)
+    return optima
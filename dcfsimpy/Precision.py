@@ -0,0 +1,105 @@
+import math
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import scipy.stats as st
+
+from .Backoffs import BackoffHistogram
+from .Cache import ResultCache
+from .DcfFunction import ResultsWriter
+from .JobQueue import JobQueue
+from .Sweep import Job, batch_jobs, job_runner, merge_outputs, point_key, replicate
+
+PRECISION_COLUMNS = ["THR", "P_COLL"]  # columns which confidence intervals are checked
+
+
+def half_width(values: List[float], alpha: float = 0.05) -> float:
+    # half width of the t-based confidence interval of the mean
+    if len(values) < 2:
+        return math.inf
+    return (
+        st.t.ppf(1 - alpha / 2, len(values) - 1)
+        * np.std(values, ddof=1)
+        / np.sqrt(len(values))
+    )
+
+
+def runs_needed(values: List[float], target_ci: float, alpha: float = 0.05) -> int:
+    # number of runs for the half width of at most target_ci of the mean,
+    # estimated with the current standard deviation
+    width = half_width(values, alpha)
+    target = target_ci * abs(np.mean(values))
+    if width <= target:
+        return len(values)
+    if target == 0:
+        return math.inf
+    return math.ceil(len(values) * pow(width / target, 2))
+
+
+def run_until_precision(
+    points: List[Job],
+    workers: Optional[int],
+    skip_results: bool,
+    backoffs: BackoffHistogram,
+    results: Union[Dict[str, List], ResultsWriter, None],
+    cache: Optional[ResultCache],
+    min_runs: int,
+    max_runs: int,
+    target_ci: float,
+    seed: int,
+    alpha: float = 0.05,
+    metrics: bool = False,
+    common_random_numbers: bool = False,
+    time_series: Optional[float] = None,
+    queue: Optional[JobQueue] = None,
+    delays: bool = False,
+) -> Dict[tuple, int]:
+    """Replicate every point until THR and P_COLL are known precisely enough.
+
+    Points are run in rounds. After every round, each point for which a half width
+    of the confidence interval of THR or P_COLL is bigger than target_ci of its
+    mean gets as many new runs as the current standard deviations suggest, but at
+    most max_runs in total. Returns the number of runs used for every point.
+    """
+    runs = {point_key(point): 0 for point in points}
+    values = {point_key(point): {c: [] for c in PRECISION_COLUMNS} for point in points}
+    pending = [(point, max(min_runs, 2)) for point in points]
+    written = 0  # jobs of earlier rounds, rows of later rounds follow theirs
+    with job_runner(workers, queue=queue) as run:
+        while pending:
+            jobs = [
+                job
+                for point, count in pending
+                for job in replicate(
+                    [point],
+                    count,
+                    seed,
+                    runs[point_key(point)],
+                    common_random_numbers,
+                )
+            ]
+            jobs = batch_jobs(jobs)
+            for index, job_results in merge_outputs(
+                backoffs,
+                results,
+                run(jobs, False, cache, metrics, time_series, delays),
+                written,
+                skip_results,
+            ):
+                for column in PRECISION_COLUMNS:
+                    values[point_key(jobs[index])][column].extend(
+                        float(value) for value in job_results[column]
+                    )
+            written += len(jobs)
+            for point, count in pending:
+                runs[point_key(point)] += count
+            pending = []
+            for point in points:
+                key = point_key(point)
+                needed = max(
+                    runs_needed(values[key][column], target_ci, alpha)
+                    for column in PRECISION_COLUMNS
+                )
+                if needed > runs[key] and runs[key] < max_runs:
+                    pending.append((point, min(needed, max_runs) - runs[key]))
+    return runs
@@ -0,0 +1,348 @@
+import itertools
+import logging
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass, fields, replace
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from numpy.random import SeedSequence
+
+from .Backoffs import BackoffHistogram
+from .BatchDcf import run_batched_simulation
+from .Cache import ResultCache
+from .DcfFunction import Config, ResultsWriter, run_simulation
+from .FastDcf import run_fast_simulation
+from .JobQueue import JobQueue
+from .Metrics import ChannelMetrics
+from .Trace import Tracer
+from .Traffic import TRAFFIC_FIELDS
+
+# keys are listed in ENGINE_NAMES and BATCH_ENGINE_NAMES of Engines too
+ENGINES = {
+    "simpy": run_simulation,  # reference model with SimPy process per station
+    "fast": run_fast_simulation,  # event-skipping model with central back off heap
+}
+BATCH_ENGINES = {
+    "batch": run_batched_simulation,  # all seeds of a sweep point as NumPy arrays
+}
+BATCH_FALLBACKS = {"batch": "fast"}  # engines running fewer seeds one by one
+BATCH_MIN_SEEDS = 20  # seeds of a point from which batched engines are faster
+# increase the version after changing results of an engine, so cached are not used
+ENGINE_VERSIONS = {"simpy": 5, "fast": 5, "batch": 5}
+
+
+@dataclass(frozen=True)
+class Job:
+    number_of_stations: int  # number of stations in the channel
+    seed: int  # seed for the simulation
+    simulation_time: float  # duration of the simulation in s
+    config: Config  # simulation parameters
+    engine: str = "simpy"  # name of the engine from ENGINES
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    number_of_stations: int  # number of stations in the channel
+    seeds: Tuple[int, ...]  # seeds of replications simulated together
+    simulation_time: float  # duration of the simulation in s
+    config: Config  # simulation parameters
+    engine: str = "batch"  # name of the engine from BATCH_ENGINES
+
+
+def point_key(job: Union[Job, BatchJob]) -> Tuple:
+    # jobs with the same key are replications of the same sweep point
+    return (
+        job.number_of_stations,
+        job.simulation_time,
+        astuple(job.config),
+        job.engine,
+    )
+
+
+def sweep_points(
+    stations: List[int],
+    parameters: Dict[str, List],
+    simulation_time: float,
+    engine: str = "simpy",
+    config: Config = Config(),
+) -> List[Job]:
+    # one job with seed 0 for every combination of numbers of stations and values
+    # of config fields, fields not in parameters are taken from config
+    names = [field.name for field in fields(Config)]
+    for name in parameters:
+        if name not in names:
+            raise ValueError(f"Unknown config field {name}, use one of {names}.")
+    return [
+        Job(
+            n,
+            0,
+            simulation_time,
+            replace(config, **dict(zip(parameters, values))),
+            engine,
+        )
+        for values in itertools.product(*parameters.values())
+        for n in stations
+    ]
+
+
+def job_cost(job: Union[Job, BatchJob]) -> float:
+    # estimated run time, transmissions grow with simulated time and every one
+    # of them costs more with more stations, batch jobs simulate all their seeds
+    runs = len(job.seeds) if isinstance(job, BatchJob) else 1
+    return job.number_of_stations * job.simulation_time * runs
+
+
+def run_seed(seed: int, run: int, point: Optional[Job] = None) -> int:
+    # seed of a run spawned from the root seed, with a point it is different for
+    # every number of stations and config, without it all points share it
+    key = (run,)
+    if point is not None:
+        key += (point.number_of_stations,) + config_key(point.config)
+    return int(SeedSequence(seed, spawn_key=key).generate_state(1)[0])
+
+
+def config_key(config: Config) -> Tuple[int, ...]:
+    # config fields as non negative integers of a SeedSequence spawn key, traffic
+    # fields are left out for saturated traffic, which does not use them
+    return tuple(
+        value if isinstance(value, int) else zlib.crc32(repr(value).encode())
+        for field, value in zip(fields(Config), astuple(config))
+        if config.traffic != "saturated" or field.name not in TRAFFIC_FIELDS
+    )
+
+
+def replicate(
+    points: List[Job],
+    runs: int,
+    seed: int,
+    first_run: int = 0,
+    common_random_numbers: bool = False,
+) -> List[Job]:
+    # with common random numbers run i of every point has the same seed, so every
+    # station draws the same random numbers and differences between points have
+    # lower variance, otherwise all runs of all points are independent
+    return [
+        replace(
+            point, seed=run_seed(seed, run, None if common_random_numbers else point)
+        )
+        for run in range(first_run, first_run + runs)
+        for point in points
+    ]
+
+
+def batch_jobs(jobs: List[Job]) -> List[Union[Job, BatchJob]]:
+    # jobs of batched engines differing only in seed are merged into one BatchJob,
+    # placed where the first of them was
+    batched = []
+    seeds = {}
+    for job in jobs:
+        if job.engine not in BATCH_ENGINES:
+            batched.append(job)
+            continue
+        key = point_key(job)
+        if key not in seeds:
+            seeds[key] = []
+            batched.append(key)
+        seeds[key].append(job.seed)
+    return [
+        (
+            BatchJob(item[0], tuple(seeds[item]), item[1], Config(*item[2]), item[3])
+            if isinstance(item, tuple)
+            else item
+        )
+        for item in batched
+    ]
+
+
+def run_job(
+    job: Union[Job, BatchJob],
+    skip_results: bool = False,
+    tracer: Optional[Tracer] = None,
+    cache: Optional[ResultCache] = None,
+    metrics: bool = False,
+    time_series: Optional[float] = None,
+    delays: bool = False,
+) -> Tuple[Dict[str, List], BackoffHistogram]:
+    if metrics and job.engine != "simpy":
+        raise ValueError(f"Engine {job.engine} does not support metrics.")
+    if isinstance(job, Job) and job.engine in BATCH_ENGINES:
+        job = batch_jobs([job])[0]  # one seed, run by the fallback engine
+    if (
+        cache is not None
+        and tracer is None
+        and not metrics
+        and time_series is None
+        and not delays
+    ):
+        cached = cache.get(job, ENGINE_VERSIONS[job.engine])
+        if cached is None:
+            results, backoffs = run_job(job)
+            cache.put(job, ENGINE_VERSIONS[job.engine], results, backoffs)
+        else:
+            results, backoffs = cached
+            logging.info(f"Cached results used for {job}")
+        return (dict() if skip_results else results), backoffs
+    results = dict()
+    backoffs = BackoffHistogram(job.config.cw_max, [job.number_of_stations])
+    if isinstance(job, BatchJob):
+        if tracer is not None:
+            raise ValueError(f"Engine {job.engine} does not support tracing.")
+        if job.config.traffic != "saturated":
+            raise ValueError(f"Engine {job.engine} simulates saturated traffic only.")
+        if len(job.seeds) < BATCH_MIN_SEEDS:
+            # a step of all seeds costs as much as steps of a few seeds one by one
+            for seed in job.seeds:
+                ENGINES[BATCH_FALLBACKS[job.engine]](
+                    job.number_of_stations,
+                    seed,
+                    job.simulation_time,
+                    skip_results,
+                    job.config,
+                    backoffs,
+                    results,
+                    time_series=time_series,
+                    delays=delays,
+                )
+        else:
+            BATCH_ENGINES[job.engine](
+                job.number_of_stations,
+                list(job.seeds),
+                job.simulation_time,
+                skip_results,
+                job.config,
+                backoffs,
+                results,
+                time_series=time_series,
+                delays=delays,
+            )
+    else:
+        options = {"metrics": ChannelMetrics()} if metrics else {}  # simpy only
+        ENGINES[job.engine](
+            job.number_of_stations,
+            job.seed,
+            job.simulation_time,
+            skip_results,
+            job.config,
+            backoffs,
+            results,
+            tracer=tracer,
+            time_series=time_series,
+            delays=delays,
+            **options,
+        )
+    return results, backoffs
+
+
+def merge_results(results: Dict[str, List], job_results: Dict[str, List]) -> None:
+    for key, values in job_results.items():
+        results.setdefault(key, []).extend(values)
+
+
+@contextmanager
+def job_runner(
+    workers: Optional[int],
+    max_jobs: Optional[int] = None,
+    queue: Optional[JobQueue] = None,
+):
+    # yields a function running jobs in worker processes, which yields (index of the
+    # job, output) pairs as jobs finish, so the same pool can be used for many rounds
+    # of jobs, with a queue jobs are run by workers of the queue instead
+    if queue is not None:
+        yield partial(_run_queued_jobs, queue)
+        return
+    workers = min(workers or os.cpu_count() or 1, max_jobs or os.cpu_count() or 1)
+    if workers <= 1:
+        yield partial(_run_jobs_with, _map_in_process)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield partial(_run_jobs_with, partial(_map_as_completed, executor))
+
+
+def _run_jobs_with(
+    mapper, jobs, skip_results, cache, metrics=False, time_series=None, delays=False
+):
+    # the most expensive jobs are submitted first, so no worker is left with a long
+    # job after the others finished, all jobs are submitted at once without waiting
+    # for any of them
+    order = sorted(
+        range(len(jobs)), key=lambda index: job_cost(jobs[index]), reverse=True
+    )
+    outputs = mapper(
+        run_job,
+        [jobs[index] for index in order],
+        [skip_results] * len(jobs),
+        [None] * len(jobs),
+        [cache] * len(jobs),
+        [metrics] * len(jobs),
+        [time_series] * len(jobs),
+        [delays] * len(jobs),
+    )
+    return ((order[index], output) for index, output in outputs)
+
+
+def _run_queued_jobs(queue, jobs, skip_results, cache, *options):
+    # the cache is a directory of this host, workers on other hosts do not have it
+    return _run_jobs_with(queue.map_unordered, jobs, skip_results, None, *options)
+
+
+def _map_in_process(function, *iterables):
+    return enumerate(map(function, *iterables))
+
+
+def _map_as_completed(executor: ProcessPoolExecutor, function, *iterables):
+    futures = {
+        executor.submit(function, *arguments): index
+        for index, arguments in enumerate(zip(*iterables))
+    }
+    return ((futures[future], future.result()) for future in as_completed(futures))
+
+
+def run_jobs(
+    jobs: List[Job],
+    workers: Optional[int],
+    skip_results: bool,
+    backoffs: BackoffHistogram,
+    results: Union[Dict[str, List], ResultsWriter, None],
+    cache: Optional[ResultCache] = None,
+    metrics: bool = False,
+    time_series: Optional[float] = None,
+    queue: Optional[JobQueue] = None,
+    delays: bool = False,
+) -> None:
+    # every job runs in its own process, longest first, with ResultsWriter rows are
+    # written as soon as their job is done and put in the order of jobs when the
+    # writer is closed, so saved results do not depend on the number of workers
+    jobs = batch_jobs(jobs)
+    with job_runner(workers, len(jobs), queue) as run:
+        for _ in merge_outputs(
+            backoffs,
+            results,
+            run(jobs, skip_results, cache, metrics, time_series, delays),
+        ):
+            pass
+
+
+def merge_outputs(
+    backoffs: BackoffHistogram,
+    results: Union[Dict[str, List], ResultsWriter, None],
+    outputs: Iterator[Tuple[int, Tuple[Dict[str, List], BackoffHistogram]]],
+    first_job: int = 0,
+    skip_results: bool = False,
+) -> Iterator[Tuple[int, Dict[str, List]]]:
+    # merges (index, output) pairs of jobs in the order they finish and yields the
+    # index and results of every job, ResultsWriter rows are written right away as
+    # job first_job + index, dict results are merged in the order of jobs once all
+    # are done, as they are kept in memory anyway
+    finished = dict()
+    for index, (job_results, job_backoffs) in outputs:
+        backoffs.merge(job_backoffs)
+        if isinstance(results, ResultsWriter) and not skip_results:
+            results.write(job_results, first_job + index)
+        elif results is not None and not skip_results:
+            finished[index] = job_results
+        yield index, job_results
+    for index in sorted(finished):
+        merge_results(results, finished[index])
@@ -0,0 +1,88 @@
+import math
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:  # NumPy is loaded by the first run with time series
+    import numpy as np
+
+TIME_SERIES_MIN_INTERVAL = 0.000001  # shortest window [s], times are in whole us
+TIME_SERIES_COLUMN = "TIME_SERIES"  # results column with counts of every run
+TIME_SERIES_COUNTERS = [
+    "BYTES",
+    "SUCCEEDED_TRANSMISSIONS",
+    "FAILED_TRANSMISSIONS",
+]  # last axis of counts
+
+
+@dataclass(slots=True)
+class ChannelTimeSeries:
+    """Bytes, successes and collisions of every station in windows of simulated time.
+
+    Counts are kept in one (windows, stations + 1, counters) array allocated at the
+    start from the simulation time, so memory does not grow while the simulation
+    runs. Stations are numbered from 1, index 0 is the channel, filled with sums of
+    all stations when the run ends. A transmission belongs to the window in which
+    its frame ends.
+    """
+
+    interval: int  # duration of a window [us]
+    counts: "np.ndarray"  # (windows, stations + 1, counters)
+
+    @classmethod
+    def create(
+        cls, interval: float, simulation_time: float, number_of_stations: int
+    ) -> "ChannelTimeSeries":
+        import numpy as np
+
+        if interval < TIME_SERIES_MIN_INTERVAL:
+            raise ValueError(f"Time series interval {interval} s is shorter than 1 us.")
+        interval = round(interval * 1000000)
+        # windows of the rounded interval, which may be shorter than the given one
+        windows = max(math.ceil(simulation_time * 1000000 / interval), 1)
+        return cls(
+            interval,
+            np.zeros(
+                (windows, number_of_stations + 1, len(TIME_SERIES_COUNTERS)),
+                dtype=np.int64,
+            ),
+        )
+
+    def succeeded(self, time: int, station: int, data_size: int) -> None:
+        counts = self.counts[int(time // self.interval), station]
+        counts[0] += data_size
+        counts[1] += 1
+
+    def failed(self, time: int, station: int) -> None:
+        self.counts[int(time // self.interval), station, 2] += 1
+
+    def add_to_results(self, results: Dict[str, List]) -> None:
+        self.counts[:, 0] = self.counts[:, 1:].sum(axis=1)
+        results.setdefault("TIME_SERIES_INTERVAL", []).append(self.interval / 1000000)
+        results.setdefault(TIME_SERIES_COLUMN, []).append(self.counts)
+
+
+def append_time_series(file: str, first_row: int, series: List["np.ndarray"]) -> None:
+    # counts of every run are added to the npz archive as run-<row of results.csv>,
+    # the archive is closed after every write, so it can be loaded with np.load
+    # while a sweep is still running
+    import numpy as np
+
+    with zipfile.ZipFile(file, "a", zipfile.ZIP_DEFLATED) as archive:
+        for row, counts in enumerate(series, first_row):
+            with archive.open(f"run-{row}.npy", "w") as entry:
+                np.lib.format.write_array(entry, counts)
+
+
+def rename_time_series(file: str, order: List[int]) -> None:
+    # run-<order[i]> becomes run-i, after rows of results.csv were sorted
+    names = {
+        f"run-{row}.npy": f"run-{new_row}.npy" for new_row, row in enumerate(order)
+    }
+    with zipfile.ZipFile(file) as archive, zipfile.ZipFile(
+        f"{file}.tmp", "w", zipfile.ZIP_DEFLATED
+    ) as renamed:
+        for name in archive.namelist():
+            renamed.writestr(names.get(name, name), archive.read(name))
+    os.replace(f"{file}.tmp", file)
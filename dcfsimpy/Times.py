@@ -1,4 +1,6 @@
 import math
+from dataclasses import dataclass
+from functools import lru_cache
 
 MCS = {
     0: [6, 6],
@@ -77,6 +79,58 @@ class Times:
         )
 
 
+@dataclass(frozen=True)
+class Airtime:
+    ppdu_frame_time: int  # data frame time [us]
+    ack_frame_time: int  # ACK frame time with SIFS [us]
+    difs: int  # DIFS time [us]
+    ack_timeout: int  # ACK timeout [us]
+    thr: float  # throughput without contention [Mb/s]
+
+
+@lru_cache(maxsize=None)
+def get_airtime(payload: int = 1472, mcs: int = 7) -> Airtime:
+    # computed once per (payload, mcs) and shared by all stations and runs in process
+    times = Times(payload, mcs)
+    return Airtime(
+        times.get_ppdu_frame_time(),
+        times.get_ack_frame_time(),
+        Times.t_difs,
+        Times.ack_timeout,
+        times.get_thr(),
+    )
+
+
+def get_airtimes(payload, mcs) -> Airtime:
+    # the same values as get_airtime, for arrays of payloads and mcs values,
+    # NumPy is imported here, so the simulation core needs only SimPy
+    import numpy as np
+
+    payload = np.asarray(payload)
+    mcs = np.asarray(mcs)
+    data_rate = np.array([MCS[i][0] for i in range(len(MCS))])[mcs]  # [b/us]
+    ctr_rate = np.array([MCS[i][1] for i in range(len(MCS))])[mcs]  # [b/us]
+    n_data = 4 * (data_rate * pow(10, -6))  # [b/symbol]
+    ofdm_preamble = 16  # [us]
+    ofdm_signal = 24 / ctr_rate  # [us]
+    mac_frame = Times.mac_overhead + payload * 8  # [b]
+    ppdu_padding = np.ceil((Times._overhead + mac_frame) / n_data) * n_data - (
+        Times._overhead + mac_frame
+    )
+    cpsdu = Times._overhead + mac_frame + ppdu_padding  # [b]
+    ppdu = np.ceil(ofdm_preamble + ofdm_signal + cpsdu / data_rate).astype(int)  # [us]
+    ack_frame = Times._overhead + Times.ack_size  # [b]
+    ack = ofdm_preamble + ofdm_signal + ack_frame / ctr_rate  # [us]
+    ack = np.ceil(Times.t_sifs + ack).astype(int)  # [us]
+    return Airtime(
+        ppdu,
+        ack,
+        np.full(ppdu.shape, Times.t_difs),
+        np.full(ppdu.shape, Times.ack_timeout),
+        (payload * 8) / (ppdu + ack + Times.t_difs),
+    )
+
+
 # print(
 #     f"Tx time: {t_difs + get_ppdu_frame_time(1472) + get_ack_frame_time()} u, Tx speed: {get_thr(1472)} Mb/u"
 # )
@@ -0,0 +1,27 @@
+import sys
+from collections import deque
+from typing import Optional, TextIO
+
+# kinds of traced events, value stored with each kind is given in the comment
+BACKOFF = "BACKOFF"  # back off time with DIFS to wait
+BACKOFF_FROZEN = "BACKOFF_FROZEN"  # remaining back off time
+BACKOFF_END = "BACKOFF_END"  # None
+TX = "TX"  # frame time
+INTERRUPT = "INTERRUPT"  # number of stations with frozen back offs
+SUCCESS = "SUCCESS"  # ack time
+COLLISION = "COLLISION"  # number of retransmissions of the frame
+ACK_TIMEOUT = "ACK_TIMEOUT"  # ack timeout
+
+
+class Tracer:
+    def __init__(self, size: int = 100000):
+        self.events = deque(maxlen=size)  # only the last size events are kept
+
+    def record(self, time: float, station: str, kind: str, value=None) -> None:
+        self.events.append((time, station, kind, value))
+
+    def dump(self, file: Optional[TextIO] = None) -> None:
+        file = file or sys.stdout
+        file.write("TIME,STATION,EVENT,VALUE\n")
+        for time, station, kind, value in self.events:
+            file.write(f"{time},{station},{kind},{'' if value is None else value}\n")
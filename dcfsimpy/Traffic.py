@@ -0,0 +1,119 @@
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+TRAFFIC = ["saturated", "poisson", "cbr", "on-off"]  # arrival processes of Config
+TRAFFIC_FIELDS = [
+    "traffic",
+    "load",
+    "queue_size",
+    "on_time",
+    "off_time",
+]  # Config fields used by unsaturated traffic only
+
+
+def arrival_times(config, stream: random.Random) -> Iterator[int]:
+    """Arrival times of frames of one station [us].
+
+    Frames of data_size B arrive with the mean rate of config.load Mb/s:
+    poisson has exponential gaps, cbr constant gaps from a random phase, so
+    stations are not synchronised. on-off alternates exponential off and on
+    periods with means off_time and on_time s, with constant gaps at the load
+    rate during on periods, so the mean load is load * on / (on + off).
+    """
+    if config.traffic not in TRAFFIC[1:]:
+        raise ValueError(f"Unknown traffic {config.traffic}, use one of {TRAFFIC}.")
+    if config.load <= 0:
+        raise ValueError(f"Load of {config.traffic} traffic must be positive.")
+    if config.traffic == "on-off" and min(config.on_time, config.off_time) <= 0:
+        raise ValueError("On and off times of on-off traffic must be positive.")
+    gap = config.data_size * 8 / config.load  # mean time between frames [us]
+    if config.traffic == "poisson":
+        time = 0.0
+        while True:
+            time += stream.expovariate(1 / gap)
+            yield round(time)
+    elif config.traffic == "cbr":
+        time = stream.random() * gap
+        while True:
+            yield round(time)
+            time += gap
+    else:
+        time = 0.0
+        while True:
+            time += stream.expovariate(1 / (config.off_time * 1000000))
+            end = time + stream.expovariate(1 / (config.on_time * 1000000))
+            while time < end:
+                yield round(time)
+                time += gap
+            time = end
+
+
+class TrafficSource:
+    """Queue of frames of an unsaturated station.
+
+    Arrivals are taken from the arrival times only when the station looks at
+    its queue, so a busy station needs no events for them and an idle one only
+    the event of its next arrival. The frame being sent stays in the queue until
+    it is sent or dropped, arrivals to a full queue are lost.
+    """
+
+    __slots__ = ("arrivals", "next_arrival", "queued", "queue_size", "arrived", "lost")
+
+    def __init__(self, arrivals: Iterator[int], queue_size: int):
+        self.arrivals = arrivals
+        self.next_arrival = next(arrivals)  # time of the first arrival not counted
+        self.queued = 0  # frames in the queue
+        self.queue_size = queue_size  # the most frames in the queue
+        self.arrived = 0  # all arrived frames
+        self.lost = 0  # frames arrived to a full queue
+
+    def update(self, now: int) -> None:
+        # count all arrivals up to now
+        while self.next_arrival <= now:
+            self.arrived += 1
+            if self.queued < self.queue_size:
+                self.queued += 1
+            else:
+                self.lost += 1
+            self.next_arrival = next(self.arrivals)
+
+
+@dataclass(slots=True)
+class ChannelTraffic:
+    sources: List[TrafficSource]  # queue of every station
+
+    def add_to_results(self, results: Dict[str, List], until: int) -> None:
+        for source in self.sources:
+            source.update(until - 1)  # arrivals are whole us before the end
+        results.setdefault("ARRIVED_FRAMES", []).append(
+            sum(source.arrived for source in self.sources)
+        )
+        results.setdefault("LOST_FRAMES", []).append(
+            sum(source.lost for source in self.sources)
+        )
+
+
+def channel_traffic(
+    config, seed: int, number_of_stations: int
+) -> Optional[ChannelTraffic]:
+    # queues of all stations, None for saturated traffic
+    if config.traffic == "saturated":
+        return None
+    return ChannelTraffic(
+        [
+            TrafficSource(
+                arrival_times(config, arrival_stream(seed, station)), config.queue_size
+            )
+            for station in range(number_of_stations)
+        ]
+    )
+
+
+def arrival_stream(seed: int, station: int) -> random.Random:
+    # spawned from the back off stream of the station, see station_streams, so
+    # arrivals of a station do not depend on the number of stations or its back offs
+    from numpy.random import SeedSequence
+
+    state = SeedSequence(seed, spawn_key=(station, 0)).generate_state(1, "uint64")
+    return random.Random(int(state[0]))
@@ -1,3 +1,114 @@
-from .CompareResults import *
+import importlib
+
+# the simulation core and modules without heavy dependencies, importing them
+# needs only SimPy
 from .DcfFunction import *
+from .Delays import *
+from .Engines import *
+from .FastDcf import *
+from .JobQueue import *
+from .Metrics import *
 from .Times import *
+from .TimeSeries import *
+from .Trace import *
+from .Traffic import *
+
+# modules using NumPy, pandas, SciPy or matplotlib are imported on the first use
+# of any of their names
+LAZY_MODULES = {
+    "Backoffs": ["BackoffHistogram"],
+    "BatchDcf": ["run_batched_simulation"],
+    "BatchMeans": ["mser_truncation", "batch_means", "run_batch_means"],
+    "Benchmark": [
+        "BENCHMARK_STATIONS",
+        "BENCHMARK_CONFIGS",
+        "BENCHMARK_RUNS",
+        "STARTUP_MODULES",
+        "measure_memory",
+        "measure_startup",
+        "benchmark_case",
+        "run_benchmark_case",
+        "run_benchmark",
+        "benchmark_key",
+        "compare_benchmarks",
+        "save_benchmark",
+        "load_benchmark",
+    ],
+    "Bianchi": ["AnalyticalResults", "solve_bianchi"],
+    "Cache": ["ResultCache"],
+    "CompareResults": [
+        "MSE_NAMES",
+        "results_thr",
+        "results_pcoll",
+        "results_payload_ns3",
+        "results_mcs_ns3",
+        "POINT_COLUMNS",
+        "ReportData",
+        "reference_with_results",
+        "calculate_p_coll_mse",
+        "calculate_thr_mse",
+        "plot_p_coll_mse",
+        "plot_thr_mse",
+        "calculate_thr_mse_stderr",
+        "plot_thr",
+        "calculate_mean_and_std",
+        "analytical_model",
+        "show_backoffs",
+        "show_backoffs_merged",
+        "show_payload",
+        "show_mcs",
+        "plot_by_multiple_cw",
+        "REPORTS",
+        "report",
+        "show_results_changing_stations",
+        "show_results_changing_payload",
+        "show_results_changing_mcs",
+        "show_results_changing_cw",
+    ],
+    "Optimize": ["CwOptimum", "cw_candidates", "optimize_cw"],
+    "Precision": [
+        "PRECISION_COLUMNS",
+        "half_width",
+        "runs_needed",
+        "run_until_precision",
+    ],
+    "Sweep": [
+        "ENGINES",
+        "BATCH_ENGINES",
+        "BATCH_FALLBACKS",
+        "BATCH_MIN_SEEDS",
+        "ENGINE_VERSIONS",
+        "Job",
+        "BatchJob",
+        "point_key",
+        "sweep_points",
+        "job_cost",
+        "run_seed",
+        "config_key",
+        "replicate",
+        "batch_jobs",
+        "run_job",
+        "merge_results",
+        "job_runner",
+        "run_jobs",
+        "merge_outputs",
+    ],
+}
+_LAZY_NAMES = {name: module for module, names in LAZY_MODULES.items() for name in names}
+# star imports get the lazy names too, which imports their modules
+__all__ = [
+    name for name in globals() if not name.startswith("_") and name != "importlib"
+] + list(_LAZY_NAMES)
+
+
+def __getattr__(name: str):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later uses do not come here
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
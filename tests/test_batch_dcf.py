@@ -0,0 +1,115 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from dcfsimpy import BatchDcf, FastDcf, run_batched_simulation, run_fast_simulation
+from dcfsimpy.Backoffs import BackoffHistogram
+from dcfsimpy.DcfFunction import Config
+from dcfsimpy.Times import Times, get_airtime
+
+SEEDS = list(range(20))
+SPAN = 16  # back off values of the first stage with cw min 15
+
+# back offs drawn by stations A, B and C, with the number of values they are drawn
+# from: A and B collide at once, C starts the moment A and B are back from ack
+# timeout, so A and B wait for idle channel instead of counting down
+DRAWS = [
+    [(0, SPAN), (1, 2 * SPAN), (15, SPAN)],
+    [(0, SPAN), (3, 2 * SPAN)],
+    [(2, SPAN), (10, SPAN)],
+]
+
+
+@pytest.mark.parametrize(
+    "stations, config",
+    [(5, Config()), (20, Config()), (10, Config(cw_min=7, cw_max=63, r_limit=3))],
+)
+def test_batch_engine_gives_statistics_of_fast_engine(stations, config):
+    # replications draw other random numbers, so only their means agree
+    fast, batch = dict(), dict()
+    for seed in SEEDS:
+        run_fast_simulation(
+            stations,
+            seed,
+            0.2,
+            False,
+            config,
+            BackoffHistogram(config.cw_max, [stations]),
+            fast,
+        )
+    run_batched_simulation(
+        stations,
+        SEEDS,
+        0.2,
+        False,
+        config,
+        BackoffHistogram(config.cw_max, [stations]),
+        batch,
+    )
+    assert batch["SEED"] == SEEDS
+    for column in ["THR", "P_COLL"]:
+        mean = np.mean(np.array(batch[column], dtype=float))
+        assert mean == pytest.approx(
+            np.mean(np.array(fast[column], dtype=float)), rel=0.03
+        )
+
+
+def number(back_off, span):
+    return (back_off + 0.5) / span
+
+
+class ScriptedStream:
+    # random numbers of one station of run_fast_simulation
+    def __init__(self, draws):
+        self.numbers = [number(*draw) for draw in draws]
+
+    def random(self):
+        return self.numbers.pop(0) if self.numbers else 0.99
+
+
+class ScriptedGenerator:
+    # random numbers of run_batched_simulation, drawn by the transmitting stations
+    # of every step in the order of stations
+    def __init__(self, steps):
+        self.steps = [np.array([number(*draw) for draw in step]) for step in steps]
+
+    def random(self, shape):
+        numbers = self.steps.pop(0) if self.steps else np.full(shape, 0.99)
+        return numbers.reshape(shape)
+
+
+def test_stations_back_when_a_transmission_starts_wait_for_idle_channel(monkeypatch):
+    # C starts difs - slot + 2 slots after the collision ends, A and B are back
+    # after the ack timeout of the same length
+    airtime = replace(get_airtime(1472, 7), ack_timeout=Times.t_difs + Times.t_slot)
+    for module in [FastDcf, BatchDcf]:
+        monkeypatch.setattr(module, "get_airtime", lambda *arguments: airtime)
+    monkeypatch.setattr(
+        FastDcf,
+        "station_streams",
+        lambda seed, stations: [ScriptedStream(draws) for draws in DRAWS],
+    )
+    monkeypatch.setattr(
+        np.random,
+        "default_rng",
+        lambda seeds: ScriptedGenerator(
+            [
+                [DRAWS[0][0], DRAWS[1][0], DRAWS[2][0]],
+                [DRAWS[0][1], DRAWS[1][1]],
+                [DRAWS[2][1]],
+                [DRAWS[0][2]],
+            ]
+        ),
+    )
+    fast, batch = dict(), dict()
+    config = Config()
+    FastDcf.run_fast_simulation(
+        3, 0, 0.0012, False, config, BackoffHistogram(1023, [3]), fast, delays=True
+    )
+    BatchDcf.run_batched_simulation(
+        3, [0], 0.0012, False, config, BackoffHistogram(1023, [3]), batch, delays=True
+    )
+    assert fast["SUCCEEDED_TRANSMISSIONS"] == batch["SUCCEEDED_TRANSMISSIONS"] == [2]
+    assert fast["FAILED_TRANSMISSIONS"] == batch["FAILED_TRANSMISSIONS"] == [2]
+    assert fast["DELAY_MEAN"] == batch["DELAY_MEAN"]
@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcfsimpy import solve_bianchi
+
+REFERENCE_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "reference-data"
+)
+
+
+def analytical_row(name):
+    results = pd.read_csv(os.path.join(REFERENCE_DATA, f"{name}.csv"))
+    row = results[results["Name"] == "Analytical model"]
+    return row[[str(n) for n in range(1, 11)]].to_numpy(dtype=float)[0]
+
+
+@pytest.mark.parametrize(
+    "column, name, tolerance",
+    [("thr", "results_thr-24", 0.05), ("p_coll", "results_p_coll-24", 0.005)],
+)
+def test_model_gives_shipped_analytical_results(column, name, tolerance):
+    expected = analytical_row(name)
+    results = solve_bianchi(np.arange(1, 11))
+    np.testing.assert_allclose(getattr(results, column), expected, atol=tolerance)
+
+
+def test_grids_are_solved_at_once():
+    n, cw_min = np.meshgrid(np.arange(1, 11), [15, 31, 63])
+    results = solve_bianchi(n, cw_min)
+    assert results.thr.shape == (3, 10)
+    for i, cw in enumerate([15, 31, 63]):
+        row = solve_bianchi(np.arange(1, 11), cw)
+        np.testing.assert_allclose(results.thr[i], row.thr)
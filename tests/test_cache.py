@@ -0,0 +1,54 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dcfsimpy import Config, Job, ResultCache
+from dcfsimpy.Sweep import ENGINE_VERSIONS, ENGINES, run_job
+
+JOB = Job(3, 1, 0.05, Config(), "fast")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(f"{tmp_path}/cache/")
+
+
+def test_results_are_simulated_once(cache, monkeypatch):
+    assert cache.get(JOB, ENGINE_VERSIONS["fast"]) is None
+    results, backoffs = run_job(JOB, cache=cache)
+    assert cache.get(JOB, ENGINE_VERSIONS["fast"]) is not None
+
+    def simulate(*arguments, **options):
+        raise AssertionError("cached job simulated again")
+
+    monkeypatch.setitem(ENGINES, "fast", simulate)
+    cached_results, cached_backoffs = run_job(JOB, cache=cache)
+    np.testing.assert_equal(cached_results, results)  # NaN for saturated traffic
+    np.testing.assert_array_equal(cached_backoffs.counts, backoffs.counts)
+    # other versions, seeds and runs collecting more than results are not cached
+    assert cache.get(JOB, ENGINE_VERSIONS["fast"] + 1) is None
+    with pytest.raises(AssertionError, match="simulated again"):
+        run_job(Job(3, 2, 0.05, Config(), "fast"), cache=cache)
+    with pytest.raises(AssertionError, match="simulated again"):
+        run_job(JOB, cache=cache, delays=True)
+
+
+def test_prune_removes_old_then_least_recently_used_entries(cache):
+    jobs = [Job(2, seed, 0.02, Config(), "fast") for seed in range(3)]
+    for job in jobs:
+        run_job(job, cache=cache)
+    now = time.time()
+    for age, job in zip([3000, 2000, 1000], jobs):
+        file = cache._file(cache.key(job, ENGINE_VERSIONS["fast"]))
+        os.utime(file, (now - age, now - age))
+    cache.get(jobs[0], ENGINE_VERSIONS["fast"])  # used last now
+    assert cache.prune(max_age=1500)[0] == 1
+    assert cache.get(jobs[1], ENGINE_VERSIONS["fast"]) is None
+    size = os.path.getsize(cache._file(cache.key(jobs[0], ENGINE_VERSIONS["fast"])))
+    assert cache.prune(max_size=size)[0] == 1
+    assert cache.get(jobs[2], ENGINE_VERSIONS["fast"]) is None
+    assert cache.get(jobs[0], ENGINE_VERSIONS["fast"]) is not None
+    assert cache.prune(max_size=0) == (1, size)
+    assert cache.prune() == (0, 0)
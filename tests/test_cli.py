@@ -0,0 +1,41 @@
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dcfsimpy
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dcf-simpy-cli.py")
+
+
+def run_cli(directory, *arguments):
+    return subprocess.run(
+        [sys.executable, CLI, *arguments],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.parametrize("engine", dcfsimpy.ENGINE_NAMES + dcfsimpy.BATCH_ENGINE_NAMES)
+def test_single_run_with_every_engine(tmp_path, engine):
+    (tmp_path / "results").mkdir()
+    run_cli(
+        tmp_path,
+        "single-run",
+        "--stations-number",
+        "3",
+        "-t",
+        "0.05",
+        "--engine",
+        engine,
+        "--no-cache",
+    )
+    (directory,) = os.listdir(tmp_path / "results")
+    with open(tmp_path / "results" / directory / "results.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1
+    assert rows[0]["N_OF_STATIONS"] == "3"
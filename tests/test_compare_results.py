@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from dcfsimpy import solve_bianchi
+from dcfsimpy.CompareResults import calculate_mean_and_std
+
+
+def results_row(r_limit, traffic="saturated"):
+    return {
+        "N_OF_STATIONS": 10,
+        "CW_MIN": 15,
+        "CW_MAX": 1023,
+        "PAYLOAD": 1472,
+        "MCS": 7,
+        "TRAFFIC": traffic,
+        "LOAD": 0.0 if traffic == "saturated" else 5.0,
+        "R_LIMIT": r_limit,
+        "THR": 28.0,
+        "P_COLL": 0.4,
+    }
+
+
+def test_analytical_columns_use_r_limit_of_every_point(tmp_path):
+    results = pd.DataFrame([results_row(1), results_row(7), results_row(7, "poisson")])
+    means = calculate_mean_and_std(results, f"{tmp_path}/results-mean.csv")
+    saturated = means[means["TRAFFIC"] == "saturated"].sort_values("R_LIMIT")
+    expected = solve_bianchi(10, 15, 1023, np.array([1, 7]), 1472, 7)
+    np.testing.assert_allclose(saturated["P_COLL_ANALYTICAL"], expected.p_coll)
+    np.testing.assert_allclose(saturated["THR_ANALYTICAL"], expected.thr)
+    # the saturated model says nothing about other traffic
+    poisson = means[means["TRAFFIC"] == "poisson"]
+    assert poisson[["THR_ANALYTICAL", "P_COLL_ANALYTICAL"]].isna().all(axis=None)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from dcfsimpy import DELAY_ACCURACY, DelaySketch
+
+
+def sketch_of(values):
+    sketch = DelaySketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+VALUES = np.random.default_rng(0).lognormal(7, 1.5, 10000)  # delays in us
+
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.95, 0.99, 1.0])
+def test_quantiles_are_within_accuracy(q):
+    expected = np.quantile(VALUES, q, method="lower")
+    assert sketch_of(VALUES).quantile(q) == pytest.approx(expected, rel=DELAY_ACCURACY)
+
+
+def test_merged_sketches_equal_sketch_of_all_values():
+    merged = sketch_of(VALUES[:3000])
+    merged.merge(sketch_of(VALUES[3000:]))
+    merged.merge(DelaySketch())
+    sketch = sketch_of(VALUES)
+    assert (merged.offset, merged.counts) == (sketch.offset, sketch.counts)
+    assert merged.mean() == pytest.approx(np.mean(VALUES))
+    copy = DelaySketch.from_text(merged.to_text())
+    assert (copy.offset, copy.counts) == (sketch.offset, sketch.counts)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import dcfsimpy
+from dcfsimpy import BackoffHistogram, Config, run_fast_simulation, run_simulation
+
+COLUMNS = [
+    "P_COLL",
+    "THR",
+    "FAILED_TRANSMISSIONS",
+    "SUCCEEDED_TRANSMISSIONS",
+    "DELAY_SKETCH",
+    "RETRIES",
+]
+
+
+def simulate(engine, stations, seed, simulation_time, config):
+    results = dict()
+    backoffs = BackoffHistogram(config.cw_max, [stations])
+    engine(
+        stations,
+        seed,
+        simulation_time,
+        False,
+        config,
+        backoffs,
+        results,
+        time_series=0.01,
+        delays=True,
+    )
+    return results, backoffs
+
+
+@pytest.mark.parametrize(
+    "stations, seed, simulation_time, config",
+    [
+        (1, 3, 0.2, Config()),
+        (5, 1, 0.2, Config()),
+        (10, 7, 0.1, Config(cw_min=1)),
+        (20, 2, 0.1, Config(cw_min=7, cw_max=63, r_limit=3)),
+        (3, 11, 0.2, Config(cw_min=1023)),
+        (4, 5, 0.2, Config(data_size=100, mcs=0)),
+        (5, 4, 0.2, Config(traffic="poisson", load=2.0)),
+    ],
+)
+def test_fast_engine_gives_results_of_simpy_engine(
+    stations, seed, simulation_time, config
+):
+    # both engines draw the same random numbers of every station in the same order
+    simpy_results, simpy_backoffs = simulate(
+        run_simulation, stations, seed, simulation_time, config
+    )
+    fast_results, fast_backoffs = simulate(
+        run_fast_simulation, stations, seed, simulation_time, config
+    )
+    for column in COLUMNS:
+        assert simpy_results[column] == fast_results[column], column
+    np.testing.assert_array_equal(
+        simpy_results["TIME_SERIES"][0], fast_results["TIME_SERIES"][0]
+    )
+    np.testing.assert_array_equal(simpy_backoffs.counts, fast_backoffs.counts)
+
+
+def test_engine_names_match_engines():
+    assert dcfsimpy.ENGINE_NAMES == list(dcfsimpy.ENGINES)
+    assert dcfsimpy.BATCH_ENGINE_NAMES == list(dcfsimpy.BATCH_ENGINES)
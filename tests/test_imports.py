@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import dcfsimpy
+
+CLI = os.path.join(os.path.dirname(__file__), "..", "dcf-simpy-cli.py")
+
+
+def run_python(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+
+
+def test_import_loads_no_heavy_modules():
+    loaded = run_python(
+        "import sys, dcfsimpy; print(*[m for m in ['numpy', 'pandas', 'scipy',"
+        " 'matplotlib'] if m in sys.modules])"
+    )
+    assert loaded == []
+
+
+def test_cli_help_loads_no_numpy():
+    loaded = run_python(
+        "import contextlib, io, runpy, sys\n"
+        f"sys.argv = [{CLI!r}, 'sweep', '--help']\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        "        runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        "print(*[m for m in ['numpy', 'pandas'] if m in sys.modules])"
+    )
+    assert loaded == []
+
+
+def test_star_import_exports_lazy_names():
+    namespace = {}
+    exec("from dcfsimpy import *", namespace)
+    for name in dcfsimpy._LAZY_NAMES:
+        assert name in namespace
+    assert namespace["BackoffHistogram"] is dcfsimpy.BackoffHistogram
+    assert "run_fast_simulation" in namespace
+
+
+def test_dir_lists_lazy_names():
+    assert {"BackoffHistogram", "run_jobs", "report"} <= set(dir(dcfsimpy))
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import pytest
+
+from dcfsimpy import BackoffHistogram, Config, Job, JobQueue, ResultCache, run_worker
+from dcfsimpy.Sweep import run_jobs
+
+
+def lose_tasks(path, attempt, stop):
+    # a worker claiming tasks of the attempt and dying before it runs them
+    while not stop.is_set():
+        for name in os.listdir(os.path.join(path, "pending")):
+            if name.endswith(f"-{attempt}.pkl"):
+                try:
+                    os.rename(
+                        os.path.join(path, "pending", name),
+                        os.path.join(path, "running", f"{name[:-4]}-lost"),
+                    )
+                except FileNotFoundError:
+                    pass
+        time.sleep(0.01)
+
+
+def claim_all(path):
+    for name in os.listdir(os.path.join(path, "pending")):
+        os.rename(
+            os.path.join(path, "pending", name),
+            os.path.join(path, "running", f"{name[:-4]}-lost"),
+        )
+
+
+def test_lost_tasks_are_run_again(tmp_path):
+    queue = JobQueue(str(tmp_path), lease_timeout=0.05, poll_interval=0.01)
+    outputs = queue.map(pow, [2, 3, 4], [2, 2, 2])
+    claim_all(tmp_path)  # all first attempts are lost
+    worker = threading.Thread(target=run_worker, args=(str(tmp_path), 1.0, 0.01))
+    worker.start()
+    try:
+        assert list(outputs) == [4, 9, 16]
+    finally:
+        worker.join()
+    for directory in ["pending", "running", "done"]:
+        assert os.listdir(tmp_path / directory) == []
+
+
+def test_tasks_fail_after_max_attempts(tmp_path):
+    queue = JobQueue(
+        str(tmp_path), lease_timeout=0.05, max_attempts=2, poll_interval=0.01
+    )
+    outputs = queue.map(pow, [2], [2])
+    claim_all(tmp_path)
+    stop = threading.Event()
+    loser = threading.Thread(target=lose_tasks, args=(str(tmp_path), 1, stop))
+    loser.start()
+    try:
+        with pytest.raises(RuntimeError, match="lost by 2 workers"):
+            list(outputs)
+    finally:
+        stop.set()
+        loser.join()
+    assert os.listdir(tmp_path / "pending") == []
+
+
+def test_queued_jobs_do_not_use_the_cache(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue"), poll_interval=0.01)
+    worker = threading.Thread(
+        target=run_worker, args=(str(tmp_path / "queue"), 1.0, 0.01)
+    )
+    worker.start()
+    try:
+        results = dict()
+        run_jobs(
+            [Job(2, 1, 0.02, Config(), "fast")],
+            None,
+            False,
+            BackoffHistogram(1023, [2]),
+            results,
+            ResultCache(f"{tmp_path}/cache/"),
+            queue=queue,
+        )
+    finally:
+        worker.join()
+    assert results["SEED"] == [1]
+    assert not os.path.exists(tmp_path / "cache")
@@ -0,0 +1,28 @@
+from dcfsimpy import BackoffHistogram, Config, Job
+from dcfsimpy.Optimize import cw_candidates, optimize_cw
+from dcfsimpy.Sweep import point_key
+
+
+def test_candidates_are_cw_sizes_between_cw_min_and_cw_max():
+    assert cw_candidates(15, 1023) == [15, 31, 63, 127, 255, 511, 1023]
+    assert cw_candidates(1, 7) == [1, 3, 7]
+
+
+def test_candidates_reach_cw_max():
+    assert cw_candidates(1, 4095)[-1] == 4095
+
+
+def test_points_with_the_same_stations_get_their_own_optimum():
+    points = [
+        Job(3, 0, 0.02, Config(data_size=size, cw_min=1, cw_max=63), "fast")
+        for size in [100, 1472]
+    ]
+    optima = optimize_cw(
+        points, 1, True, BackoffHistogram(63, [3]), None, None, 2, 4, 0
+    )
+    assert set(optima) == {point_key(point) for point in points}
+    for optimum in optima.values():
+        assert optimum.cw_min in cw_candidates(1, 63)
+        # every search evaluates the 6 cw min candidates, some of them twice
+        assert 6 * 2 <= optimum.evaluations <= 6 * 4
+        assert optimum.grid_evaluations == 6 * 4
@@ -0,0 +1,127 @@
+import csv
+from dataclasses import astuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dcfsimpy import BackoffHistogram, Config, ResultsWriter
+from dcfsimpy.Sweep import (
+    job_cost,
+    job_runner,
+    merge_outputs,
+    replicate,
+    run_jobs,
+    sweep_points,
+)
+
+STATIONS = [1, 2, 3, 4, 5]
+
+
+@pytest.fixture
+def results_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+    return tmp_path
+
+
+def sweep_jobs():
+    return replicate(sweep_points(STATIONS, {}, 0.05, "fast"), 3, 0)
+
+
+def read_rows(file):
+    with open(file, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_points_are_every_combination_of_stations_and_fields():
+    points = sweep_points([2, 3], {"cw_min": [7, 15], "mcs": [0, 7]}, 0.1)
+    assert len(points) == 8
+    assert sorted((job.number_of_stations, astuple(job.config)) for job in points) == [
+        (n, astuple(Config(cw_min=cw_min, mcs=mcs)))
+        for n in [2, 3]
+        for cw_min in [7, 15]
+        for mcs in [0, 7]
+    ]
+    with pytest.raises(ValueError, match="Unknown config field"):
+        sweep_points([2], {"cw": [7]}, 0.1)
+
+
+def test_largest_points_cost_most():
+    costs = [job_cost(job) for job in sweep_points(STATIONS, {}, 0.05)]
+    assert costs == sorted(costs)
+
+
+def test_runs_of_points_have_their_own_seeds():
+    points = sweep_points([2, 3], {}, 0.05)
+    seeds = [job.seed for job in replicate(points, 2, 1)]
+    assert len(set(seeds)) == 4
+    assert seeds != [job.seed for job in replicate(points, 2, 2)]
+    common = [job.seed for job in replicate(points, 2, 1, common_random_numbers=True)]
+    assert common[0] == common[1] != common[2] == common[3]
+
+
+def test_rows_are_written_as_jobs_finish(results_directory):
+    # job 0 is the cheapest and runs last, rows of jobs done before it are on disk
+    jobs = sweep_jobs()
+    backoffs = BackoffHistogram(1023, STATIONS)
+    writer = ResultsWriter(backoffs, "sweep")
+    with job_runner(2) as run:
+        outputs = merge_outputs(backoffs, writer, run(jobs, False, None))
+        finished = [next(outputs)[0] for _ in range(3)]
+        outputs.close()
+    rows = read_rows(f"{writer.path}results.csv")
+    assert 0 not in finished
+    assert rows[0][0] == "JOB"
+    assert [int(row[0]) for row in rows[1:]] == finished
+
+
+def test_closed_results_are_in_job_order(tmp_path, monkeypatch):
+    saved = []
+    for workers in [1, 2]:
+        (tmp_path / str(workers) / "results").mkdir(parents=True)
+        monkeypatch.chdir(tmp_path / str(workers))
+        backoffs = BackoffHistogram(1023, STATIONS)
+        writer = ResultsWriter(backoffs, "sweep")
+        run_jobs(sweep_jobs(), workers, False, backoffs, writer, time_series=0.01)
+        path = writer.close()
+        header, *rows = read_rows(f"{path}results.csv")
+        series = np.load(f"{path}time-series.npz")
+        for row, values in enumerate(rows):
+            succeeded = values[header.index("SUCCEEDED_TRANSMISSIONS")]
+            assert series[f"run-{row}"][:, 0, 1].sum() == int(succeeded)
+        assert header[0] == "TIMESTAMP"
+        saved.append([values[1:] for values in rows])
+    assert saved[0] == saved[1]
+    seeds = [str(job.seed) for job in sweep_jobs()]
+    assert [values[header.index("SEED") - 1] for values in saved[1]] == seeds
+
+
+def test_dict_results_are_in_job_order():
+    # jobs run longest first, but their results are merged in the order of jobs
+    results = dict()
+    run_jobs(sweep_jobs(), 2, False, BackoffHistogram(1023, STATIONS), results)
+    assert results["SEED"] == [job.seed for job in sweep_jobs()]
+    assert results["N_OF_STATIONS"] == [job.number_of_stations for job in sweep_jobs()]
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [
+        {"r_limit": [1, 7]},
+        {"queue_size": [2, 100]},
+        {"on_time": [0.001, 0.01]},
+        {"off_time": [0.001, 0.01]},
+    ],
+)
+def test_points_of_every_field_have_their_own_means(results_directory, parameters):
+    from dcfsimpy.CompareResults import calculate_mean_and_std
+
+    config = Config(traffic="on-off", load=20.0)
+    jobs = replicate(sweep_points([3], parameters, 0.02, "fast", config), 2, 0)
+    backoffs = BackoffHistogram(1023, [3])
+    writer = ResultsWriter(backoffs, "sweep")
+    run_jobs(jobs, 1, False, backoffs, writer)
+    path = writer.close()
+    means = calculate_mean_and_std(pd.read_csv(f"{path}results.csv"), "mean.csv")
+    assert means["RUNS"].to_list() == [2, 2]
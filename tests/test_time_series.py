@@ -0,0 +1,34 @@
+import pytest
+
+from dcfsimpy import BackoffHistogram, ChannelTimeSeries, Config, run_fast_simulation
+
+
+@pytest.mark.parametrize("interval", [0.0, 0.0000004, 0.0000009])
+def test_intervals_shorter_than_a_us_are_rejected(interval):
+    with pytest.raises(ValueError):
+        ChannelTimeSeries.create(interval, 0.01, 2)
+
+
+@pytest.mark.parametrize(
+    "interval, windows", [(0.0000014, 10000), (0.0000016, 5000), (0.003, 4)]
+)
+def test_windows_cover_the_simulation_in_rounded_intervals(interval, windows):
+    # 1.4 us is rounded down to 1 us, so 0.01 s needs more than 0.01 s / 1.4 us
+    assert ChannelTimeSeries.create(interval, 0.01, 2).counts.shape == (windows, 3, 3)
+
+
+def test_every_transmission_is_counted_with_a_rounded_down_interval():
+    results = dict()
+    run_fast_simulation(
+        5,
+        1,
+        0.01,
+        False,
+        Config(),
+        BackoffHistogram(1023, [5]),
+        results,
+        time_series=0.0000014,
+    )
+    counts = results["TIME_SERIES"][0]
+    assert counts[:, 0, 1].sum() == results["SUCCEEDED_TRANSMISSIONS"][0]
+    assert (counts[:, 0] == counts[:, 1:].sum(axis=1)).all()
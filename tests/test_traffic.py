@@ -0,0 +1,28 @@
+import pytest
+
+from dcfsimpy import BackoffHistogram, Config, run_fast_simulation
+
+
+def throughput(config, simulation_time=1.0):
+    results = dict()
+    run_fast_simulation(
+        5,
+        1,
+        simulation_time,
+        False,
+        config,
+        BackoffHistogram(1023, [5]),
+        results,
+    )
+    return float(results["THR"][0])
+
+
+@pytest.mark.parametrize("traffic", ["poisson", "cbr"])
+def test_unsaturated_stations_send_their_load(traffic):
+    # 5 stations of 2 Mb/s are far below the saturation throughput
+    assert throughput(Config(traffic=traffic, load=2.0)) == pytest.approx(10, rel=0.1)
+
+
+def test_unsaturated_traffic_needs_a_load():
+    with pytest.raises(ValueError, match="must be positive"):
+        throughput(Config(traffic="poisson"), 0.01)